@@ -0,0 +1,83 @@
+import time
+import threading
+
+from Utils.background import LazyThread
+
+
+class AdviceWorker:
+    """
+    Keeps an in-memory snapshot of precomputed advice, refreshed by a
+    background thread every `interval` seconds.
+
+    `compute` returns the whole snapshot as a dict; it is swapped in at once,
+    so readers never see a half-built snapshot and never block on I/O.
+    """
+
+    def __init__(self, compute, interval=600, stale_after=None):
+        self.compute = compute
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else 2 * interval
+        self._snapshot = {}
+        self._updated_at = None
+        self._enabled = False
+        self._worker = LazyThread(self._run, "advice-worker", reset=self._reset)
+        self._reset()
+
+    def _reset(self):
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def refresh(self):
+        started = time.monotonic()
+        snapshot = self.compute()
+        self._snapshot = snapshot
+        self._updated_at = time.time()
+        print(f"🌦️ [Advice] Refreshed {len(snapshot)} entries in {time.monotonic() - started:.2f}s")
+        return snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ [Advice] Refresh failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        self._enabled = True
+        self._stop.clear()
+        self._worker.ensure()
+        return self
+
+    def stop(self):
+        self._enabled = False
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self):
+        """Ask the worker to refresh now instead of waiting for the interval."""
+        self._wake.set()
+
+    @property
+    def running(self):
+        """True once started; in a forked child this starts the thread for that process."""
+        if self._enabled:
+            self._worker.ensure()
+        return self._enabled and self._worker.alive
+
+    def get(self, key):
+        return self._snapshot.get(key)
+
+    @property
+    def updated_at(self):
+        """Wall-clock time of the last successful refresh (None before the first)."""
+        return self._updated_at
+
+    def age(self):
+        """Seconds since the last successful refresh (None before the first)."""
+        return None if self._updated_at is None else time.time() - self._updated_at
+
+    def is_stale(self):
+        age = self.age()
+        return age is None or age > self.stale_after
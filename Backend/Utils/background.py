@@ -0,0 +1,59 @@
+import os
+import threading
+import weakref
+
+
+def at_fork_in_child(obj, reset):
+    """Calls reset(obj) in every forked child for as long as obj is alive."""
+    if not hasattr(os, 'register_at_fork'):
+        return  # no fork() on this platform
+    ref = weakref.ref(obj)
+
+    def after_in_child():
+        target = ref()
+        if target is not None:
+            reset(target)
+
+    os.register_at_fork(after_in_child=after_in_child)
+
+
+class LazyThread:
+    """
+    A daemon thread started on first use, once per process.
+
+    Threads don't survive a fork (e.g. gunicorn --preload starts them in the
+    master), so in a forked child the parent's thread is forgotten and
+    `reset()` runs to recreate the owner's per-process state (queues, events,
+    locks); the next ensure() then starts a fresh thread in that process.
+    """
+
+    def __init__(self, target, name, reset=None):
+        self.target = target
+        self.name = name
+        self.reset = reset
+        self._lock = threading.Lock()
+        self._thread = None
+        at_fork_in_child(self, LazyThread._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        if self.reset is not None:
+            self.reset()
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def ensure(self):
+        """Starts the thread unless it is already running in this process."""
+        if self.alive:
+            return
+        with self._lock:
+            if not self.alive:
+                self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+                self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
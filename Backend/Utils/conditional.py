@@ -0,0 +1,78 @@
+import hashlib
+from functools import wraps
+
+from flask import Response, make_response, request
+
+from Utils.metrics import span
+
+# Response headers that belong to the payload and are replayed from the cache
+PAYLOAD_HEADERS = ('X-Next-Cursor',)
+
+
+class ConditionalGet:
+    """
+    Decorator factory for per-user read endpoints backed by version counters.
+
+    `versions(user_id, resources)` returns the user's current counter for
+    each resource; any write that changes a resource must bump its counter.
+    The ETag is derived from those counters, the user, the path and the
+    query string, so a matching If-None-Match is answered with 304 before the
+    handler (and its query) runs. With a `payload_cache` (a TTLCache) the serialized body
+    of a 200 is kept under its ETag and replayed on the next miss.
+    """
+
+    def __init__(self, versions, payload_cache=None):
+        self.versions = versions
+        self.payload_cache = payload_cache
+
+    def etag_for(self, user_id, resources, tag=''):
+        with span('db'):
+            versions = self.versions(user_id, resources)
+        parts = [str(user_id), *(f"{r}:{versions.get(r, 0)}" for r in resources), tag, request.path, request.query_string.decode()]
+        return f"{resources[0]}-" + hashlib.sha1('|'.join(parts).encode()).hexdigest()[:20]
+
+    def __call__(self, *resources, tag=None, headers=None):
+        """
+        `tag()` returns extra state the payload depends on, or None when the
+        response can't be versioned right now (then only a body-hash ETag is
+        set). `headers()` returns headers to add to every response, 304s included.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(current_user, *args, **kwargs):
+                extra = tag() if tag else ''
+                if extra is None:
+                    # Not versionable: still let the client skip the download
+                    response = make_response(f(current_user, *args, **kwargs))
+                    if response.status_code == 200:
+                        response.add_etag()
+                        response.make_conditional(request)
+                    return response
+
+                etag = self.etag_for(current_user.id, resources, extra)
+                extra_headers = headers() if headers else {}
+                if request.if_none_match.contains(etag):
+                    response = Response(status=304)
+                    response.set_etag(etag)
+                    response.headers.update(extra_headers)
+                    return response
+
+                cached = self.payload_cache.get((current_user.id, etag)) if self.payload_cache else None
+                if cached is not None:
+                    body, payload_headers = cached
+                    response = Response(body, mimetype='application/json', headers=payload_headers)
+                else:
+                    response = make_response(f(current_user, *args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if self.payload_cache:
+                        payload_headers = {k: response.headers[k] for k in PAYLOAD_HEADERS if k in response.headers}
+                        self.payload_cache.set((current_user.id, etag), (response.get_data(), payload_headers))
+
+                response.set_etag(etag)
+                # Browsers must revalidate, but may keep the body for the 304
+                response.headers['Cache-Control'] = 'private, no-cache'
+                response.headers.update(extra_headers)
+                return response
+            return decorated
+        return decorator
@@ -1,71 +1,165 @@
-import pandas as pd 
+import pandas as pd
+import numpy as np
+import hashlib
 import json
 import re
 import os
+import sys
 
 # Define paths relative to this script
 current_dir = os.path.dirname(os.path.abspath(__file__))
 raw_file_path = os.path.join(current_dir, '..', 'Data', 'Raw', 'complete_crop_cultivation_guide.csv')
 output_file_path = os.path.join(current_dir, '..', 'Data', 'Processed', 'crop_rules.json')
+# Compact binary copy of the rules for fast loading at startup, and the build stamp
+binary_output_path = os.path.splitext(output_file_path)[0] + '.npz'
+meta_file_path = os.path.splitext(output_file_path)[0] + '.meta.json'
+
+# Rows per chunk when streaming the raw CSV
+CHUNK_SIZE = 50000
+RAW_COLUMNS = ['Crop_Name', 'Fertilizer_Application', 'Growing_Duration', 'Cultivation_Guide']
+
+# Robust patterns for N, P, K, compiled once
+# Matches "N:120", "120g N", "N: 120-150", etc.
+# Each nutrient tries its patterns in order and keeps the first that matches.
+NPK_PATTERNS = {
+    "N": [re.compile(r'N\s*[:\-]\s*(\d+)', re.IGNORECASE),
+          re.compile(r'(\d+)(?:\s*-\s*\d+|)(?:\s*g|kg|)\s*N', re.IGNORECASE)],
+    "P": [re.compile(r'P(?:2[O0]5|)\s*[:\-]\s*(\d+)', re.IGNORECASE),
+          re.compile(r'(\d+)(?:\s*-\s*\d+|)(?:\s*g|kg|)\s*P', re.IGNORECASE)],
+    "K": [re.compile(r'K(?:2[O0]|)\s*[:\-]\s*(\d+)', re.IGNORECASE),
+          re.compile(r'(\d+)(?:\s*-\s*\d+|)(?:\s*g|kg|)\s*K', re.IGNORECASE)]
+}
 
 def extract_npk(text):
     if not isinstance(text, str):
         return {"N": 0, "P": 0, "K": 0}
-    
+
     res = {"N": 0, "P": 0, "K": 0}
-    
-    # Robust patterns for N, P, K
-    # Matches "N:120", "120g N", "N: 120-150", etc.
-    patterns = {
-        "N": [r'N\s*[:\-]\s*(\d+)', r'(\d+)(?:\s*-\s*\d+|)(?:\s*g|kg|)\s*N'],
-        "P": [r'P(?:2[O0]5|)\s*[:\-]\s*(\d+)', r'(\d+)(?:\s*-\s*\d+|)(?:\s*g|kg|)\s*P'],
-        "K": [r'K(?:2[O0]|)\s*[:\-]\s*(\d+)', r'(\d+)(?:\s*-\s*\d+|)(?:\s*g|kg|)\s*K']
-    }
-
-    for key, regex_list in patterns.items():
+    for key, regex_list in NPK_PATTERNS.items():
         for pattern in regex_list:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 res[key] = int(match.group(1))
                 break # Found for this nutrient, move to next
-                
+
     return res
 
-def clean_data():
+def extract_npk_series(texts):
+    """Vectorized extract_npk: one int column per nutrient, 0 where nothing matched."""
+    # An all-blank chunk is read as float64, which has no .str accessor
+    texts = texts.astype(object).where(texts.map(lambda v: isinstance(v, str)))
+    out = {}
+    for key, regex_list in NPK_PATTERNS.items():
+        values = texts.str.extract(regex_list[0], expand=False)
+        for pattern in regex_list[1:]:
+            values = values.fillna(texts.str.extract(pattern, expand=False))
+        out[key] = values.fillna(0).astype(int)
+    return pd.DataFrame(out, index=texts.index)
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_up_to_date(source_hash, binary):
+    """True when the outputs were built from a raw file with this exact content."""
+    if not os.path.exists(output_file_path) or not os.path.exists(meta_file_path):
+        return False
+    if binary and not os.path.exists(binary_output_path):
+        return False
     try:
-        if not os.path.exists(raw_file_path):
-             print(f"Error: Could not find file at {raw_file_path}")
-             return
+        with open(meta_file_path) as f:
+            return json.load(f).get('source_sha256') == source_hash
+    except (OSError, ValueError):
+        return False
 
-        df = pd.read_csv(raw_file_path)
-        print("Raw CSV Loaded Successfully")
-    except Exception as e:
-        print(f"Error loading CSV: {e}")
+def iter_crop_rules(path, chunk_size=None):
+    """Streams the raw CSV chunk by chunk, yielding (crop_name, rule) pairs."""
+    for chunk in pd.read_csv(path, chunksize=chunk_size or CHUNK_SIZE, usecols=RAW_COLUMNS):
+        chunk = chunk.dropna(subset=['Crop_Name'])
+        npk = extract_npk_series(chunk['Fertilizer_Application'])
+        names = chunk['Crop_Name'].astype(str).str.strip().tolist()
+        durations = chunk['Growing_Duration'].tolist()
+        tips = chunk['Cultivation_Guide'].tolist()
+
+        for name, n, p, k, duration, tip in zip(names, npk['N'].tolist(), npk['P'].tolist(), npk['K'].tolist(), durations, tips):
+            # Add other useful info for the frontend
+            yield name, {
+                "ideal_nitrogen": n,
+                "ideal_phosphorus": p,
+                "ideal_potassium": k,
+                "duration": duration,
+                "tips": tip
+            }
+
+def save_binary_rules(crop_rules, path=None):
+    """Column-oriented .npz copy of the rules: fixed-width arrays, no pickle."""
+    path = path or binary_output_path
+    names = list(crop_rules.keys())
+    rules = list(crop_rules.values())
+    np.savez(
+        path,
+        names=np.array(names, dtype=str),
+        npk=np.array([[r['ideal_nitrogen'], r['ideal_phosphorus'], r['ideal_potassium']] for r in rules], dtype=np.int32).reshape(-1, 3),
+        duration=np.array(['' if pd.isna(r['duration']) else str(r['duration']) for r in rules], dtype=str),
+        tips=np.array(['' if pd.isna(r['tips']) else str(r['tips']) for r in rules], dtype=str)
+    )
+
+def load_crop_rules(prefer_binary=True):
+    """Loads the processed rules as {crop_name: rule}, from the .npz copy when available."""
+    if prefer_binary and os.path.exists(binary_output_path):
+        with np.load(binary_output_path, allow_pickle=False) as data:
+            return {
+                str(name): {
+                    "ideal_nitrogen": int(npk[0]),
+                    "ideal_phosphorus": int(npk[1]),
+                    "ideal_potassium": int(npk[2]),
+                    "duration": str(duration),
+                    "tips": str(tips)
+                }
+                for name, npk, duration, tips in zip(data['names'], data['npk'], data['duration'], data['tips'])
+            }
+    with open(output_file_path) as f:
+        return json.load(f)
+
+def clean_data(force=False, binary=True):
+    if not os.path.exists(raw_file_path):
+         print(f"Error: Could not find file at {raw_file_path}")
+         return
+
+    source_hash = file_sha256(raw_file_path)
+    if not force and is_up_to_date(source_hash, binary):
+        print("Raw CSV unchanged since last build; skipping.")
         return
 
     crop_rules = {}
-    for index, row in df.iterrows():
-        crop_name = row['Crop_Name'].strip()
-        npk_values = extract_npk(row['Fertilizer_Application'])
-        
-        # Add other useful info for the frontend
-        crop_rules[crop_name] = {
-            "ideal_nitrogen": npk_values['N'],
-            "ideal_phosphorus": npk_values['P'],
-            "ideal_potassium": npk_values['K'],
-            "duration": row['Growing_Duration'],
-            "tips": row['Cultivation_Guide']
-        }
+    rows = 0
+    try:
+        for crop_name, rule in iter_crop_rules(raw_file_path):
+            crop_rules[crop_name] = rule
+            rows += 1
+        print(f"Raw CSV Loaded Successfully ({rows} rows)")
+    except Exception as e:
+        print(f"Error loading CSV: {e}")
+        return
 
     # Save to JSON
     # Ensure directory exists
     os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
-    
+
     with open(output_file_path, 'w') as f:
         json.dump(crop_rules, f, indent=4)
-    
+    if binary:
+        save_binary_rules(crop_rules)
+
+    # Stamp written last, so an interrupted build is redone next time
+    with open(meta_file_path, 'w') as f:
+        json.dump({"source_sha256": source_hash, "rows": rows, "crops": len(crop_rules)}, f, indent=4)
+
     print(f"Success! Cleaned data saved to: {output_file_path}")
-    
+
     if crop_rules:
         print("Example Entry:")
         # Print the first item to verify
@@ -75,4 +169,4 @@ def clean_data():
         print("Warning: No crop rules extracted.")
 
 if __name__ == "__main__":
-    clean_data()
\ No newline at end of file
+    clean_data(force='--force' in sys.argv, binary='--no-binary' not in sys.argv)
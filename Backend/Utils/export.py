@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+# Rows encoded per yielded chunk: large enough to avoid tiny socket writes,
+# small enough that memory stays flat whatever the export size
+ROWS_PER_CHUNK = 500
+
+
+def _cell(value):
+    return value.isoformat(sep=' ', timespec='seconds') if isinstance(value, datetime) else value
+
+
+def ndjson_chunks(columns, rows, rows_per_chunk=ROWS_PER_CHUNK):
+    """One JSON object per line, keyed by column name."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, map(_cell, row)))))
+        if len(lines) >= rows_per_chunk:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def csv_chunks(columns, rows, rows_per_chunk=ROWS_PER_CHUNK):
+    """Header line, then CSV rows, reusing one buffer per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 1
+    for row in rows:
+        writer.writerow([_cell(v) for v in row])
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def export_chunks(fmt, columns, rows):
+    """Streams `rows` (an iterable of tuples in `columns` order) as text chunks."""
+    if fmt == 'csv':
+        return csv_chunks(columns, rows)
+    return ndjson_chunks(columns, rows)
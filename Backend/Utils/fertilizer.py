@@ -0,0 +1,72 @@
+import numpy as np
+
+# Land units -> hectares (1 guntha = 1/40 acre)
+HECTARES_PER_UNIT = {
+    'acre': 0.404686,
+    'hectare': 1.0,
+    'guntha': 0.404686 / 40
+}
+UNIT_ALIASES = {
+    'acre': 'acre', 'acres': 'acre', 'ac': 'acre',
+    'hectare': 'hectare', 'hectares': 'hectare', 'ha': 'hectare',
+    'guntha': 'guntha', 'gunthas': 'guntha', 'gunta': 'guntha'
+}
+
+# Nutrient content by weight: Urea 46% N; DAP 18% N, 46% P2O5; MOP 60% K2O
+UREA_N = 0.46
+DAP_N = 0.18
+DAP_P = 0.46
+MOP_K = 0.60
+BAG_KG = {'urea': 45, 'dap': 50, 'mop': 50}
+
+
+def normalize_unit(unit):
+    """Canonical unit name, or None if it isn't a supported land unit."""
+    return UNIT_ALIASES.get(str(unit or 'acre').strip().lower())
+
+
+class CropNutrientTable:
+    """
+    Ideal N/P/K per crop from the processed crop rules, held as one (n, 3)
+    float array with a lower-cased name -> row index for lookups.
+    """
+
+    def __init__(self, crop_rules):
+        names = list(crop_rules.keys())
+        self.index = {name.strip().lower(): i for i, name in enumerate(names)}
+        self.names = names
+        self.ideal = np.array(
+            [[r['ideal_nitrogen'], r['ideal_phosphorus'], r['ideal_potassium']] for r in crop_rules.values()],
+            dtype=np.float64
+        ).reshape(-1, 3)
+
+    @classmethod
+    def load(cls):
+        # Imported here so the app doesn't pull in pandas just to serve requests
+        from Utils.data_cleaner import load_crop_rules
+        return cls(load_crop_rules())
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, crops):
+        """Row index per crop name, -1 where the crop is unknown."""
+        return np.array([self.index.get(str(c).strip().lower(), -1) for c in crops], dtype=np.int64)
+
+
+def fertilizer_requirements(ideal, soil, hectares):
+    """
+    Vectorized over fields: `ideal` and `soil` are (n, 3) N/P/K in kg/ha,
+    `hectares` is (n,). Returns per-hectare gaps and total kg / bag counts.
+
+    DAP covers the phosphorus gap first; the nitrogen it brings is credited
+    before topping up with Urea, and MOP covers potassium.
+    """
+    gap = np.clip(ideal - soil, 0, None)
+    dap = gap[:, 1] / DAP_P
+    urea = np.clip(gap[:, 0] - dap * DAP_N, 0, None) / UREA_N
+    mop = gap[:, 2] / MOP_K
+
+    kg = np.column_stack([urea, dap, mop]) * hectares[:, None]
+    bags = np.ceil(kg / np.array([BAG_KG['urea'], BAG_KG['dap'], BAG_KG['mop']]))
+    return {'gap': gap, 'kg': kg, 'bags': bags.astype(np.int64)}
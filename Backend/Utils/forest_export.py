@@ -0,0 +1,172 @@
+import os
+import joblib
+import numpy as np
+
+FOREST_SUFFIX = '.forest.joblib'
+
+
+def forest_path_for(pkl_path, version):
+    # model_store imports this module, so its helpers are imported at call time
+    from Utils.model_store import derived_path
+    return derived_path(pkl_path, version, FOREST_SUFFIX)
+
+
+def _smallest_int(max_value):
+    for dtype in (np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class CompiledForest:
+    """
+    A trained tree ensemble flattened into contiguous NumPy arrays.
+
+    All trees share one node table. For a leaf, `left` holds -(leaf_index + 1)
+    and `leaf_values` row leaf_index holds the class distribution, so internal
+    nodes carry no per-class payload. predict_proba() walks every tree for a
+    whole batch at once, one depth level per step, and matches sklearn:
+    inputs are compared as float32 against float64 thresholds.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.leaf_values = arrays['leaf_values']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+        self.n_features_in_ = int(arrays['n_features'])
+        self.classes_ = arrays['classes']
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        n = X.shape[0]
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            left = self.left[node]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(internal, np.where(go_left, left, self.right[node]), node)
+
+        leaves = -self.left[node].astype(np.int64) - 1
+        return self.leaf_values[leaves].mean(axis=1, dtype=np.float64)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def export_forest(model):
+    """Flattens a fitted sklearn forest (or single decision tree) into compact arrays."""
+    trees = [est.tree_ for est in getattr(model, 'estimators_', [model])]
+
+    n_nodes = sum(t.node_count for t in trees)
+    n_leaves = sum(int((t.children_left == -1).sum()) for t in trees)
+    node_dtype = _smallest_int(max(n_nodes, n_leaves) + 1)
+
+    feature = np.zeros(n_nodes, dtype=_smallest_int(model.n_features_in_))
+    threshold = np.zeros(n_nodes, dtype=np.float64)
+    left = np.zeros(n_nodes, dtype=node_dtype)
+    right = np.zeros(n_nodes, dtype=node_dtype)
+    leaf_values = np.zeros((n_leaves, len(model.classes_)), dtype=np.float32)
+    roots = np.zeros(len(trees), dtype=node_dtype)
+
+    node_offset = leaf_offset = 0
+    for i, t in enumerate(trees):
+        count = t.node_count
+        is_leaf = t.children_left == -1
+        leaf_ids = np.cumsum(is_leaf) - 1 + leaf_offset
+        sl = slice(node_offset, node_offset + count)
+
+        roots[i] = node_offset
+        feature[sl] = np.where(is_leaf, 0, t.feature)
+        threshold[sl] = t.threshold
+        left[sl] = np.where(is_leaf, -(leaf_ids + 1), t.children_left + node_offset)
+        right[sl] = np.where(is_leaf, 0, t.children_right + node_offset)
+
+        # Normalise per leaf, like DecisionTreeClassifier.predict_proba
+        values = t.value[is_leaf][:, 0, :]
+        totals = values.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1
+        leaf_values[leaf_offset:leaf_offset + is_leaf.sum()] = values / totals
+
+        node_offset += count
+        leaf_offset += int(is_leaf.sum())
+
+    return {
+        'feature': feature,
+        'threshold': threshold,
+        'left': left,
+        'right': right,
+        'leaf_values': leaf_values,
+        'roots': roots,
+        'max_depth': max(t.max_depth for t in trees),
+        'n_features': model.n_features_in_,
+        'classes': np.asarray(model.classes_)
+    }
+
+
+def sample_inputs(arrays, n=2000, seed=0):
+    """Random rows spread across every feature's split thresholds."""
+    rng = np.random.default_rng(seed)
+    internal = arrays['left'] >= 0
+    X = np.zeros((n, arrays['n_features']), dtype=np.float64)
+    for f in range(arrays['n_features']):
+        thr = arrays['threshold'][internal & (arrays['feature'] == f)]
+        if len(thr):
+            lo, hi = thr.min(), thr.max()
+            pad = max(hi - lo, 1.0) * 0.1
+            X[:, f] = rng.uniform(lo - pad, hi + pad, n)
+    return X
+
+
+def verify_forest(model, compiled, X, atol=1e-5):
+    """Max |difference| against model.predict_proba; raises if above atol."""
+    expected = model.predict_proba(X)
+    diff = float(np.abs(expected - compiled.predict_proba(X)).max())
+    if diff > atol:
+        raise ValueError(f"Compiled forest differs from predict_proba by {diff:.2e}")
+    return diff
+
+
+def compile_model_file(pkl_path, version=None):
+    """
+    Exports the {'model', 'columns'} bundle at pkl_path to a forest file and
+    verifies it against predict_proba. The export is keyed by the pickle's
+    content hash and skipped when it already exists. Returns (out_path, version).
+    """
+    from Utils.model_store import atomic_dump, load_pickle_versioned, model_version, remove_stale_derived
+    version = version or model_version(pkl_path)
+    out_path = forest_path_for(pkl_path, version)
+    if os.path.exists(out_path):
+        return out_path, version
+
+    model_data, version = load_pickle_versioned(pkl_path)
+    out_path = forest_path_for(pkl_path, version)
+    if os.path.exists(out_path):
+        return out_path, version
+    model = model_data['model']
+    arrays = export_forest(model)
+    diff = verify_forest(model, CompiledForest(arrays), sample_inputs(arrays))
+
+    atomic_dump({'forest': arrays, 'columns': model_data['columns']}, out_path, mode_from=pkl_path)
+    remove_stale_derived(pkl_path, FOREST_SUFFIX, keep=out_path)
+    print(f"🌲 [System] Compiled forest written to {out_path} (max diff {diff:.1e})")
+    return out_path, version
+
+
+def load_compiled_model(pkl_path, use_mmap=True):
+    """Loads (compiling first if needed) and returns ({'model', 'columns'}, version)."""
+    path, version = compile_model_file(pkl_path)
+    data = joblib.load(path, mmap_mode='r' if use_mmap else None)
+    return {'model': CompiledForest(data['forest']), 'columns': data['columns']}, version
+
+
+if __name__ == "__main__":
+    from Utils.model_store import MODEL_PATH
+    compile_model_file(MODEL_PATH)
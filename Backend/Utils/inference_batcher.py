@@ -0,0 +1,138 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from Utils.background import LazyThread
+from Utils.metrics import Histogram
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class _Pending:
+    __slots__ = ('x', 'args', 'future', 'enqueued_at')
+
+    def __init__(self, x, args):
+        self.x = x
+        self.args = args
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class InferenceBatcher:
+    """
+    Collects feature rows from concurrent requests and scores them together.
+
+    The first row to arrive opens a window of `window_ms`; everything queued
+    before it closes (or until `max_batch` rows are waiting) goes into one
+    `score(X)` call. `score` must return one result per row of X, and each
+    caller gets back the results for its own rows.
+
+    Extra `submit` arguments are passed through to `score(X, *args)`; rows
+    are only stacked with rows submitted with the very same arguments (e.g.
+    the model version a request started on).
+    """
+
+    def __init__(self, score, window_ms=5, max_batch=64):
+        self.score = score
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._worker = LazyThread(self._run, "inference-batcher", reset=self._reset)
+        self._reset()
+        # Exported on /metrics; the stats() dict keeps lifetime totals for /api/model/info
+        self.batch_size_histogram = Histogram(
+            'inference_batch_size', 'Rows scored per batched predict_proba call.', buckets=BATCH_SIZE_BUCKETS
+        )
+        self.queue_wait_histogram = Histogram(
+            'inference_queue_wait_seconds', 'Time each row waited in the batch queue before scoring.'
+        )
+        self._stats = {
+            'batches': 0,
+            'rows': 0,
+            'max_batch_size': 0,
+            'batch_size_buckets': {str(b): 0 for b in BATCH_SIZE_BUCKETS + ('+Inf',)},
+            'queue_wait_ms_total': 0.0,
+            'queue_wait_ms_max': 0.0
+        }
+
+    def _reset(self):
+        # Per-process queue; rows queued in a parent are never scored in a child
+        self._queue = queue.Queue()
+
+    def submit(self, x, *args, timeout=None):
+        """Scores the rows of x (2-D) and returns their results as a list."""
+        self._worker.ensure()
+        pending = _Pending(x, args)
+        self._queue.put(pending)
+        return pending.future.result(timeout=timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        rows = len(first.x)
+        deadline = first.enqueued_at + self.window
+        while rows < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item.x)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            groups = {}
+            for item in batch:
+                groups.setdefault(tuple(map(id, item.args)), []).append(item)
+            for items in groups.values():
+                self._score(items)
+            self._record(batch, started)
+
+    def _score(self, items):
+        try:
+            X = items[0].x if len(items) == 1 else np.vstack([item.x for item in items])
+            results = self.score(X, *items[0].args)
+            offset = 0
+            for item in items:
+                n = len(item.x)
+                item.future.set_result(list(results[offset:offset + n]))
+                offset += n
+        except Exception as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+
+    def _record(self, batch, started):
+        size = sum(len(item.x) for item in batch)
+        waits = [(started - item.enqueued_at) * 1000 for item in batch]
+        bucket = next((str(b) for b in BATCH_SIZE_BUCKETS if size <= b), '+Inf')
+        self.batch_size_histogram.observe(size)
+        for item, wait_ms in zip(batch, waits):
+            for _ in range(len(item.x)):
+                self.queue_wait_histogram.observe(wait_ms / 1000)
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['rows'] += size
+            self._stats['max_batch_size'] = max(self._stats['max_batch_size'], size)
+            self._stats['batch_size_buckets'][bucket] += 1
+            self._stats['queue_wait_ms_total'] += sum(waits)
+            self._stats['queue_wait_ms_max'] = max(self._stats['queue_wait_ms_max'], max(waits))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, batch_size_buckets=dict(self._stats['batch_size_buckets']))
+        stats['avg_batch_size'] = round(stats['rows'] / stats['batches'], 2) if stats['batches'] else 0
+        stats['avg_queue_wait_ms'] = round(stats['queue_wait_ms_total'] / stats['rows'], 3) if stats['rows'] else 0
+        stats['window_ms'] = self.window * 1000
+        stats['max_batch'] = self.max_batch
+        return stats
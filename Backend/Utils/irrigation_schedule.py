@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+import numpy as np
+
+# Virtual task ids are negative so they never collide with IrrigationTask ids:
+# -(planted_crop_id * VIRTUAL_ID_STRIDE + occurrence), occurrence starting at 1
+VIRTUAL_ID_STRIDE = 100000
+
+
+def irrigation_due_dates(planting_date, harvest_date, freq):
+    """Every `freq` days after planting, strictly before harvest, in one vectorized pass."""
+    offsets = np.arange(freq, (harvest_date - planting_date).days, freq).astype('timedelta64[D]')
+    return (np.datetime64(planting_date, 'us') + offsets).tolist()
+
+
+def encode_virtual_task_id(planted_crop_id, occurrence):
+    return -(planted_crop_id * VIRTUAL_ID_STRIDE + occurrence)
+
+
+def decode_virtual_task_id(task_id):
+    """Returns (planted_crop_id, occurrence) for a virtual task id."""
+    if task_id >= 0:
+        raise ValueError("Not a virtual task id")
+    return divmod(-task_id, VIRTUAL_ID_STRIDE)
+
+
+def virtual_due_date(planting_date, harvest_date, freq, occurrence):
+    """Due date of the n-th irrigation (1-based), or None if it falls outside the schedule."""
+    if occurrence < 1:
+        return None
+    due_date = planting_date + timedelta(days=freq * occurrence)
+    return due_date if due_date < harvest_date else None
@@ -0,0 +1,122 @@
+import time
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+# Latency buckets in seconds (Prometheus defaults, plus a few sub-millisecond ones)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for label_values, series in items:
+            labels = list(zip(self.label_names, label_values))
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint', 'method', 'status')
+)
+STAGE_DURATION = Histogram(
+    'stage_duration_seconds', 'Time spent in named hot-path stages.', ('stage',)
+)
+
+
+@contextmanager
+def span(stage):
+    """
+    Times a named stage: always recorded in the stage histogram, and added to
+    the current request's breakdown (used by the slow-request log).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, stage)
+        if has_request_context():
+            stages = g.setdefault('stages', {})
+            stages[stage] = stages.get(stage, 0.0) + elapsed
+
+
+def init_request_metrics(app, slow_request_ms=None):
+    """Request middleware: per-endpoint latency histogram and optional slow log."""
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+        g.stages = {}
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        # Route rule keeps label cardinality bounded (no raw ids in paths)
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_DURATION.observe(elapsed, endpoint, request.method, response.status_code)
+
+        if slow_request_ms is not None and elapsed * 1000 >= slow_request_ms:
+            breakdown = ', '.join(f"{k}={v * 1000:.1f}ms" for k, v in g.get('stages', {}).items()) or 'no stages'
+            print(f"🐢 [Slow] {request.method} {endpoint} {response.status_code} took {elapsed * 1000:.1f}ms ({breakdown})")
+        return response
+
+
+def format_gauges(prefix, values, help_text=''):
+    """Renders a flat dict of numeric stats as Prometheus gauges."""
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{key}"
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return lines
+
+
+def render_metrics(extra_lines=()):
+    lines = REQUEST_DURATION.render() + STAGE_DURATION.render() + list(extra_lines)
+    return '\n'.join(lines) + '\n'
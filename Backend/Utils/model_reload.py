@@ -0,0 +1,131 @@
+import os
+import time
+import threading
+
+from Utils.background import LazyThread, at_fork_in_child
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ModelReloader:
+    """
+    Runs `reload()` (load, validate and swap in a new model) on a background
+    thread, so serving never waits on it. One reload runs at a time; asking
+    again while one is in flight just reports it. `reload()` returns False
+    when there was nothing to swap (e.g. the file is already active).
+
+    With `watch_interval` set, a watcher thread polls `path` and reloads
+    once a changed file has looked the same for two polls in a row, so a
+    copy still being written isn't picked up half-way. Each process (e.g.
+    every gunicorn --preload worker) starts its own watcher on first use
+    via ensure_watcher().
+    """
+
+    def __init__(self, reload, path, watch_interval=None):
+        self.reload = reload
+        self.path = path
+        self.watch_interval = watch_interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watcher = LazyThread(self._watch, "model-watcher")
+        self._stop = threading.Event()
+        self._watch_enabled = False
+        self._seen = None
+        self._status = {
+            'reloads': 0,
+            'skipped': 0,
+            'failures': 0,
+            'in_progress': False,
+            'last_started_at': None,
+            'last_finished_at': None,
+            'last_seconds': None,
+            'last_error': None,
+            'last_reason': None
+        }
+        at_fork_in_child(self, ModelReloader._after_fork)
+
+    def _run(self, reason):
+        started = time.time()
+        try:
+            swapped = self.reload() is not False
+            with self._lock:
+                self._status['reloads' if swapped else 'skipped'] += 1
+                self._status['last_error'] = None
+        except Exception as e:
+            print(f"❌ [Model] Reload ({reason}) failed, keeping the current model: {e}")
+            with self._lock:
+                self._status['failures'] += 1
+                self._status['last_error'] = str(e)
+        finally:
+            with self._lock:
+                self._status['in_progress'] = False
+                self._status['last_finished_at'] = time.time()
+                self._status['last_seconds'] = round(time.time() - started, 3)
+
+    def _after_fork(self):
+        # A reload the parent had running doesn't exist in this process
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._status['in_progress'] = False
+        self._thread = None
+
+    def trigger(self, reason='manual'):
+        """Starts a reload in the background. Returns the thread, or None if one is already running."""
+        with self._lock:
+            if self._status['in_progress']:
+                return None
+            self._status.update(in_progress=True, last_started_at=time.time(), last_reason=reason)
+            self._thread = threading.Thread(target=self._run, args=(reason,), name="model-reload", daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def _watch(self):
+        pending = None
+        while not self._stop.wait(self.watch_interval):
+            current = file_signature(self.path)
+            if current is None or current == self._seen:
+                pending = None
+                continue
+            if current != pending:
+                # Changed since the last poll: wait for it to settle
+                pending = current
+                continue
+            if self.trigger('file changed') is not None:
+                self._seen = current
+            pending = None
+
+    def start_watcher(self):
+        """Enables watching; the signature seen now is inherited by forked workers."""
+        if not self.watch_interval:
+            return
+        self._watch_enabled = True
+        if self._seen is None:
+            self._seen = file_signature(self.path)
+        self.ensure_watcher()
+
+    def ensure_watcher(self):
+        """Starts this process's watcher thread if watching is enabled and it isn't running yet."""
+        if not self._watch_enabled or self._watcher.alive:
+            return
+        self._stop.clear()
+        self._watcher.ensure()
+        print(f"👀 [Model] Watching {self.path} every {self.watch_interval}s (pid {os.getpid()})")
+
+    def stop(self):
+        self._watch_enabled = False
+        self._stop.set()
+
+    @property
+    def watching(self):
+        return self._watcher.alive
+
+    def status(self):
+        with self._lock:
+            return dict(self._status, watching=self.watching)
@@ -0,0 +1,166 @@
+import io
+import os
+import glob
+import time
+import stat
+import hashlib
+import tempfile
+import joblib
+
+from Utils.forest_export import load_compiled_model
+
+# Paths are relative to the Backend directory, like the rest of the app
+MODEL_PATH = os.getenv("MODEL_PATH", os.path.join('Models', 'crop_recommendation_model.pkl'))
+MMAP_SUFFIX = '.mmap.joblib'
+
+
+def atomic_dump(obj, out_path, mode_from=None):
+    """
+    Dumps uncompressed to a uniquely named temp file next to out_path, then
+    renames it into place. Workers converting at the same moment each write
+    their own temp file, so none ever maps a partially written one.
+    mkstemp creates the file 0600; with `mode_from` the output takes that
+    file's permission bits instead, so other users that can read the model
+    can read its derived copies too.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path) or '.', prefix=os.path.basename(out_path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        joblib.dump(obj, tmp_path, compress=0)
+        if mode_from is not None:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(mode_from).st_mode))
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def model_version(pkl_path, block_size=1 << 20):
+    """Content hash of the model file, short enough to show in responses."""
+    digest = hashlib.sha256()
+    with open(pkl_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def load_pickle_versioned(pkl_path):
+    """
+    Reads the pickle once and returns (model_data, version), both from the
+    same bytes, so a file replaced mid-load is never labelled with the
+    other file's hash.
+    """
+    with open(pkl_path, 'rb') as f:
+        raw = f.read()
+    return joblib.load(io.BytesIO(raw)), hashlib.sha256(raw).hexdigest()[:12]
+
+
+def derived_path(pkl_path, version, suffix):
+    """Files derived from a model are named by its content hash, never trusted by mtime."""
+    return f"{os.path.splitext(pkl_path)[0]}.{version}{suffix}"
+
+
+def remove_stale_derived(pkl_path, suffix, keep):
+    """Deletes derived files of other versions (and the old unversioned name); best effort."""
+    stem = os.path.splitext(pkl_path)[0]
+    for path in glob.glob(glob.escape(stem) + '.*' + suffix) + [stem + suffix]:
+        if path != keep and os.path.exists(path):
+            try:
+                # Workers that already mapped it keep their pages until they unmap
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def mmap_path_for(pkl_path, version):
+    return derived_path(pkl_path, version, MMAP_SUFFIX)
+
+
+def convert_for_mmap(pkl_path=MODEL_PATH, version=None):
+    """
+    Re-dumps the pickled {'model', 'columns'} bundle uncompressed, so joblib
+    stores every NumPy array as a raw block that can be memory-mapped.
+    The copy is keyed by the pickle's content hash, so a model swapped in
+    with an older mtime (rollback, cp -p, rsync) still gets its own copy.
+    Returns (out_path, version).
+    """
+    version = version or model_version(pkl_path)
+    out_path = mmap_path_for(pkl_path, version)
+    if os.path.exists(out_path):
+        return out_path, version
+
+    model_data, version = load_pickle_versioned(pkl_path)
+    out_path = mmap_path_for(pkl_path, version)
+    if not os.path.exists(out_path):
+        atomic_dump(model_data, out_path, mode_from=pkl_path)
+        remove_stale_derived(pkl_path, MMAP_SUFFIX, keep=out_path)
+        print(f"📦 [System] Converted model to memory-mappable layout: {out_path}")
+    return out_path, version
+
+
+def resident_memory_mb():
+    """Current RSS of this process in MB (None if it can't be determined)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if os.uname().sysname == 'Darwin' else 1024), 1)
+    except Exception:
+        return None
+
+
+def load_model_bundle(pkl_path=MODEL_PATH, use_mmap=True, backend='sklearn'):
+    """
+    Loads the model bundle and returns (model_data, stats).
+
+    With use_mmap the pickle is converted once and then opened with
+    mmap_mode='r': arrays joblib can map stay in the shared page cache
+    instead of being copied into every worker. Objects that copy their
+    arrays on unpickle (sklearn's Tree nodes) are still shared when the app
+    is preloaded before forking (e.g. gunicorn --preload) via copy-on-write.
+
+    backend='compiled' serves a CompiledForest (see Utils.forest_export)
+    exported from the pickle and verified against predict_proba; its flat
+    arrays are memory-mapped as-is, so workers genuinely share them.
+    """
+    rss_before = resident_memory_mb()
+    started = time.perf_counter()
+
+    # Every branch reports the version of the bytes it actually loaded
+    if backend == 'compiled':
+        try:
+            model_data, version = load_compiled_model(pkl_path, use_mmap=use_mmap)
+        except OSError as e:
+            # Read-only deploy directory, or an export this user can't read
+            print(f"⚠️ [System] Could not use compiled model ({e}); loading pickle.")
+            backend, use_mmap = 'sklearn', False
+    elif use_mmap:
+        try:
+            mmap_path, version = convert_for_mmap(pkl_path)
+            model_data = joblib.load(mmap_path, mmap_mode='r')
+        except OSError as e:
+            # Read-only deploy directory: fall back to the plain pickle
+            print(f"⚠️ [System] Could not use memory-mapped model ({e}); loading pickle.")
+            use_mmap = False
+    if backend != 'compiled' and not use_mmap:
+        model_data, version = load_pickle_versioned(pkl_path)
+
+    rss_after = resident_memory_mb()
+    stats = {
+        'path': pkl_path,
+        'version': version,
+        'mmap': use_mmap,
+        'backend': backend,
+        'load_seconds': round(time.perf_counter() - started, 3),
+        'rss_mb': rss_after,
+        'rss_delta_mb': round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None,
+        'pid': os.getpid()
+    }
+    return model_data, stats
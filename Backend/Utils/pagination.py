@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+DEFAULT_MAX_LIMIT = 500
+
+
+def parse_bool(value, name):
+    if value is None:
+        return None
+    lowered = value.lower()
+    if lowered in ('1', 'true', 'yes'):
+        return True
+    if lowered in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f"'{name}' must be true or false")
+
+
+def parse_date(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format")
+
+
+def date_window(column, start, end):
+    """Filter clauses for start <= column <= end, both whole days and optional."""
+    clauses = []
+    if start:
+        clauses.append(column >= start)
+    if end:
+        clauses.append(column < end + timedelta(days=1))
+    return clauses
+
+
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def parse_page_args(args, max_limit=DEFAULT_MAX_LIMIT):
+    """
+    Reads ?limit= and ?cursor= from the query string.
+    Returns (limit, cursor); limit is None when the client didn't ask to page.
+    """
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+    if limit is None and cursor is None:
+        return None, None
+    try:
+        limit = int(limit) if limit is not None else max_limit
+    except ValueError:
+        raise ValueError("'limit' must be an integer")
+    if limit < 1:
+        raise ValueError("'limit' must be at least 1")
+    return min(limit, max_limit), (decode_cursor(cursor) if cursor else None)
+
+
+def paginate(query, sort_col, id_col, limit=None, cursor=None, descending=False, key=None):
+    """
+    Keyset pagination over (sort_col, id_col).
+
+    Returns (rows, next_cursor). `key` maps a result row to its
+    (sort_value, id) pair and defaults to reading the two columns by name,
+    which works for ORM entities.
+    """
+    if cursor is not None:
+        sort_value, row_id = cursor
+        if descending:
+            query = query.filter(or_(sort_col < sort_value, and_(sort_col == sort_value, id_col < row_id)))
+        else:
+            query = query.filter(or_(sort_col > sort_value, and_(sort_col == sort_value, id_col > row_id)))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+
+    if limit is None:
+        return query.all(), None
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    if key is None:
+        last = rows[-1]
+        return rows, encode_cursor(getattr(last, sort_col.key), getattr(last, id_col.key))
+    return rows, encode_cursor(*key(rows[-1]))
@@ -0,0 +1,112 @@
+import json
+import math
+from functools import lru_cache
+
+import numpy as np
+
+NO_RISK = {"level": "Low", "msg": "No immediate threats detected."}
+
+# One row per rule, checked in order: a crop uses the first rule whose keyword
+# appears in its (lower-cased) name. Bounds left out are unbounded; "temp_min"
+# and "temp_max" are inclusive, the "_above" / "_below" variants exclusive.
+DEFAULT_PEST_RULES = [
+    {"id": "rice_blast", "keywords": ["rice"], "humidity_above": 85, "temp_min": 25, "temp_max": 32,
+     "level": "High", "msg": "Potential Blast Disease risk due to extreme humidity."},
+    {"id": "maize_stem_borer", "keywords": ["maize"], "temp_above": 32, "humidity_above": 70,
+     "level": "Moderate", "msg": "Watch for Stem Borer activity in warm weather."},
+    {"id": "wheat_leaf_rust", "keywords": ["wheat"], "temp_min": 15, "temp_max": 25, "humidity_above": 80,
+     "level": "Moderate", "msg": "Check for Leaf Rust development in damp conditions."},
+    {"id": "cotton_bollworm", "keywords": ["cotton"], "temp_above": 30, "humidity_above": 60,
+     "level": "Moderate", "msg": "Potential Pink Bollworm threat in heat."},
+    {"id": "downy_mildew", "keywords": ["grapes", "mango"], "humidity_above": 75,
+     "level": "Moderate", "msg": "Downy Mildew risk: Avoid leaf moisture."},
+    {"id": "tikka_leaf_spot", "keywords": ["ground nut", "peanut"], "humidity_above": 80, "temp_below": 25,
+     "level": "Moderate", "msg": "Risk of Tikka Leaf Spot in cool, damp weather."},
+    {"id": "root_rot", "keywords": ["lentil", "chickpea"], "humidity_above": 70,
+     "level": "Moderate", "msg": "Monitor for Root Rot in overly moist soil."},
+]
+
+
+def _bounds(rule, key):
+    """(low, low_inclusive, high, high_inclusive) for 'temp' or 'humidity'."""
+    low, low_incl = -math.inf, True
+    high, high_incl = math.inf, True
+    if f"{key}_min" in rule:
+        low, low_incl = rule[f"{key}_min"], True
+    if f"{key}_above" in rule:
+        low, low_incl = rule[f"{key}_above"], False
+    if f"{key}_max" in rule:
+        high, high_incl = rule[f"{key}_max"], True
+    if f"{key}_below" in rule:
+        high, high_incl = rule[f"{key}_below"], False
+    return low, low_incl, high, high_incl
+
+
+def _in_range(values, low, low_incl, high, high_incl):
+    above = np.where(low_incl, values >= low, values > low)
+    below = np.where(high_incl, values <= high, values < high)
+    return above & below
+
+
+class PestRuleEngine:
+    """
+    Pest and disease rules compiled into NumPy arrays.
+
+    Crop names resolve to a rule index once (cached); scoring a batch is a
+    handful of vectorized comparisons over the rule arrays.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._keywords = [[k.lower() for k in r['keywords']] for r in self.rules]
+
+        temp = [_bounds(r, 'temp') for r in self.rules]
+        hum = [_bounds(r, 'humidity') for r in self.rules]
+        # One trailing "no rule" slot so index -1 is safe to gather
+        self.temp_low = np.array([b[0] for b in temp] + [0.0])
+        self.temp_low_incl = np.array([b[1] for b in temp] + [True])
+        self.temp_high = np.array([b[2] for b in temp] + [0.0])
+        self.temp_high_incl = np.array([b[3] for b in temp] + [True])
+        self.hum_low = np.array([b[0] for b in hum] + [0.0])
+        self.hum_low_incl = np.array([b[1] for b in hum] + [True])
+        self.hum_high = np.array([b[2] for b in hum] + [0.0])
+        self.hum_high_incl = np.array([b[3] for b in hum] + [True])
+
+        self._results = [{"level": r['level'], "msg": r['msg']} for r in self.rules]
+        self.resolve = lru_cache(maxsize=4096)(self._resolve)
+
+    @classmethod
+    def from_file(cls, path):
+        """Loads a JSON list of rules in the DEFAULT_PEST_RULES format."""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def _resolve(self, crop):
+        crop = (crop or '').lower()
+        for i, keywords in enumerate(self._keywords):
+            if any(k in crop for k in keywords):
+                return i
+        return -1
+
+    def resolve_many(self, crops):
+        return np.fromiter((self.resolve(c) for c in crops), dtype=np.int64, count=len(crops))
+
+    def match_batch(self, rule_ids, temps, hums):
+        """Boolean array: does each row's rule fire at its temperature / humidity?"""
+        rule_ids = np.asarray(rule_ids)
+        temps = np.asarray(temps, dtype=np.float64)
+        hums = np.asarray(hums, dtype=np.float64)
+        idx = np.where(rule_ids >= 0, rule_ids, len(self.rules))
+
+        fires = _in_range(temps, self.temp_low[idx], self.temp_low_incl[idx], self.temp_high[idx], self.temp_high_incl[idx])
+        fires &= _in_range(hums, self.hum_low[idx], self.hum_low_incl[idx], self.hum_high[idx], self.hum_high_incl[idx])
+        return fires & (rule_ids >= 0)
+
+    def assess_batch(self, crops, temps, hums):
+        """Risk dicts for parallel arrays of crop names, temperatures and humidities."""
+        rule_ids = self.resolve_many(crops)
+        fires = self.match_batch(rule_ids, temps, hums)
+        return [self._results[r] if hit else NO_RISK for r, hit in zip(rule_ids.tolist(), fires.tolist())]
+
+    def assess(self, crop, temp, hum):
+        return self.assess_batch([crop], [temp], [hum])[0]
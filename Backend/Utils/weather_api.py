@@ -1,18 +1,47 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
 import requests
+from requests.adapters import HTTPAdapter
 
-def get_weather(city_name, api_key):
+BASE_URL = os.getenv("WEATHER_API_URL", "http://api.openweathermap.org/data/2.5/weather")
+
+# Cache tuning (seconds / entries), overridable from the environment
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 600))
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", 1800))
+WEATHER_CACHE_NEGATIVE_TTL = float(os.getenv("WEATHER_CACHE_NEGATIVE_TTL", 60))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", 1024))
+
+# Fan-out for multi-city lookups: bounded pool, one overall deadline
+WEATHER_MAX_WORKERS = int(os.getenv("WEATHER_MAX_WORKERS", 8))
+WEATHER_FANOUT_DEADLINE = float(os.getenv("WEATHER_FANOUT_DEADLINE", 4))
+
+# One pooled session per process so repeated lookups reuse TCP connections
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+def normalize_city(city_name):
+    return " ".join(city_name.split()).lower() if city_name else ""
+
+
+def fetch_weather(city_name, api_key):
     """
     Fetches current Temperature (C) and Humidity (%) for a city.
+    Always hits the upstream API; use get_weather() for the cached path.
     """
-    base_url = "http://api.openweathermap.org/data/2.5/weather"
     params = {
         'q': city_name,
         'appid': api_key,
         'units': 'metric'
     }
-    
+
     try:
-        response = requests.get(base_url, params=params, timeout=3)
+        response = _session.get(BASE_URL, params=params, timeout=3)
         if response.status_code == 200:
             data = response.json()
             return {
@@ -24,4 +53,133 @@ def get_weather(city_name, api_key):
             return None
     except Exception as e:
         print(f"Weather API Error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+class WeatherCache:
+    """
+    Process-wide TTL + LRU cache for weather lookups.
+
+    - Fresh entries are served for `ttl` seconds.
+    - Failed lookups (None) are cached for `negative_ttl` seconds.
+    - Entries up to `stale_ttl` seconds past expiry are served as-is while a
+      background thread refreshes them (stale-while-revalidate).
+    - At most `max_entries` cities are kept; the least recently used go first.
+    - Concurrent misses for the same city share one upstream call (single-flight).
+    """
+
+    def __init__(self, fetch, ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_CACHE_STALE_TTL,
+                 negative_ttl=WEATHER_CACHE_NEGATIVE_TTL, max_entries=WEATHER_CACHE_MAX_ENTRIES):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._refreshing = set()
+        self._inflight = {}  # key -> Future for the upstream call in progress
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'negative_hits': 0, 'refreshes': 0, 'evictions': 0, 'coalesced': 0}
+
+    def get(self, city_name, api_key):
+        key = normalize_city(city_name)
+        if not key:
+            return None
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                self._entries.move_to_end(key)
+                if now < expires_at:
+                    self._stats['negative_hits' if value is None else 'hits'] += 1
+                    return value
+                if value is not None and now < expires_at + self.stale_ttl:
+                    self._stats['stale'] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, city_name, api_key), daemon=True).start()
+                    return value
+            self._stats['misses'] += 1
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        value = None
+        try:
+            value = self.fetch(city_name, api_key)
+            self._store(key, value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(value)
+        return value
+
+    def _refresh(self, key, city_name, api_key):
+        try:
+            value = self.fetch(city_name, api_key)
+            # Keep serving the old reading if the refresh itself failed
+            if value is not None:
+                self._store(key, value)
+            with self._lock:
+                self._stats['refreshes'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, value):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'size': len(self._entries), 'max_entries': self.max_entries}
+
+
+weather_cache = WeatherCache(fetch_weather)
+_fanout_pool = ThreadPoolExecutor(max_workers=WEATHER_MAX_WORKERS, thread_name_prefix="weather")
+
+
+def get_weather(city_name, api_key):
+    """
+    Fetches current Temperature (C) and Humidity (%) for a city,
+    served from the process-wide cache when possible.
+    """
+    return weather_cache.get(city_name, api_key)
+
+
+def get_weather_many(city_names, api_key, deadline=WEATHER_FANOUT_DEADLINE):
+    """
+    Resolves every distinct city concurrently and returns {city: weather}.
+    Cities still pending when the deadline passes map to None.
+    """
+    cities = list(dict.fromkeys(c for c in city_names if c))
+    if not cities:
+        return {}
+    if len(cities) == 1:
+        return {cities[0]: get_weather(cities[0], api_key)}
+
+    futures = {_fanout_pool.submit(get_weather, city, api_key): city for city in cities}
+    done, _ = wait(futures, timeout=deadline)
+    return {city: (f.result() if f in done else None) for f, city in futures.items()}
+
+
+def weather_cache_stats():
+    return weather_cache.stats()
@@ -0,0 +1,128 @@
+import time
+import queue
+import threading
+
+from Utils.background import LazyThread
+
+
+class WriteBehindBuffer:
+    """
+    Bounded in-process queue of rows flushed in batches by a background thread.
+
+    Rows are handed to `flush(rows)` every `flush_rows` rows or `flush_ms`
+    milliseconds, whichever comes first. When `max_queue` rows are already
+    waiting, put() blocks for up to `enqueue_timeout` seconds (backpressure)
+    and then returns False so the caller can write synchronously instead.
+    close() drains whatever is left; register it to run on shutdown.
+
+    `flush` must write a batch atomically. When it raises, the batch is
+    retried in halves so one bad row only drops itself ('failed' counts
+    dropped rows, 'retried' counts split batches).
+    """
+
+    def __init__(self, flush, flush_rows=100, flush_ms=500, max_queue=10000, enqueue_timeout=1.0):
+        self.flush = flush
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_ms / 1000.0
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+        self._lock = threading.Lock()
+        self._worker = LazyThread(self._run, "write-behind", reset=self._reset)
+        self._reset()
+        self._stats = {'enqueued': 0, 'flushed': 0, 'batches': 0, 'rejected': 0, 'retried': 0, 'failed': 0}
+
+    def _reset(self):
+        # Per-process state; a forked child starts with an empty queue of its own
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._closed = False
+        self._stop = threading.Event()
+
+    def put(self, row):
+        """Queues one row; False if the queue stayed full past the timeout."""
+        if self._closed:
+            return False
+        self._worker.ensure()
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            return False
+        with self._lock:
+            self._stats['enqueued'] += 1
+        return True
+
+    def _drain(self, first):
+        rows = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.flush_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                row = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if row is None:
+                break  # woken by close(); the run loop sees _stop
+            rows.append(row)
+        return rows
+
+    def _write(self, rows):
+        try:
+            self.flush(rows)
+        except Exception as e:
+            if len(rows) == 1:
+                print(f"❌ [WriteBehind] Dropping a row that failed to flush: {e}")
+                with self._lock:
+                    self._stats['failed'] += 1
+                return
+            # One bad row fails the whole batch: retry in halves to isolate it
+            with self._lock:
+                self._stats['retried'] += 1
+            mid = len(rows) // 2
+            self._write(rows[:mid])
+            self._write(rows[mid:])
+            return
+        with self._lock:
+            self._stats['flushed'] += len(rows)
+            self._stats['batches'] += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            first = self._queue.get()
+            if first is None:
+                break
+            self._write(self._drain(first))
+
+        # Stop requested: flush everything still queued
+        rest = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not None:
+                rest.append(row)
+        for i in range(0, len(rest), self.flush_rows):
+            self._write(rest[i:i + self.flush_rows])
+
+    def close(self, timeout=10):
+        """Stops accepting rows and blocks until the queue has been flushed."""
+        if not self._worker.alive:
+            return
+        self._closed = True
+        self._stop.set()
+        try:
+            # Wake the worker if it's waiting on an empty queue
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # not waiting: it checks _stop after its current batch
+        self._worker.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        stats['max_queue'] = self.max_queue
+        return stats
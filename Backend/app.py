@@ -1,17 +1,42 @@
 import os
+import hmac
+import time
+import threading
+import heapq
+import atexit
 import json
 import jwt
 from functools import wraps
+from collections import namedtuple
 from datetime import datetime, timedelta
-import pandas as pd
-import joblib
-from flask import Flask, request, jsonify
+import warnings
+import numpy as np
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, false, func, insert, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased, contains_eager
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 
-from Utils.weather_api import get_weather
+from Utils.weather_api import get_weather, get_weather_many, weather_cache_stats
+from Utils.advice_worker import AdviceWorker
+from Utils.model_store import MODEL_PATH, load_model_bundle, model_version, resident_memory_mb
+from Utils.model_reload import ModelReloader
+from Utils.inference_batcher import InferenceBatcher
+from Utils.irrigation_schedule import (
+    decode_virtual_task_id, encode_virtual_task_id, irrigation_due_dates, virtual_due_date
+)
+from Utils.write_behind import WriteBehindBuffer
+from Utils.metrics import format_gauges, init_request_metrics, render_metrics, span
+from Utils.pest_rules import DEFAULT_PEST_RULES, PestRuleEngine
+from Utils.ttl_cache import TTLCache
+from Utils.conditional import ConditionalGet
+from Utils.export import EXPORT_FORMATS, export_chunks
+from Utils.fertilizer import HECTARES_PER_UNIT, CropNutrientTable, fertilizer_requirements, normalize_unit
+from Utils.pagination import date_window, encode_cursor, paginate, parse_bool, parse_date, parse_page_args
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +44,10 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
+# Request timing: per-endpoint histograms at /metrics, optional slow-request log with stage breakdown
+SLOW_REQUEST_MS = os.getenv("SLOW_REQUEST_MS")
+init_request_metrics(app, slow_request_ms=float(SLOW_REQUEST_MS) if SLOW_REQUEST_MS else None)
+
 # --- CONFIGURATION ---
 app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "your-super-secret-key")
 
@@ -29,19 +58,71 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "Cropmanagment")
 
-# URI for PostgreSQL
-app.config['SQLALCHEMY_DATABASE_URI'] = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# URI for PostgreSQL (DATABASE_URL overrides it, e.g. sqlite:///bench.db for offline runs)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    "DATABASE_URL",
+    f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
 
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
 
+# Model loading: 'sklearn' serves the pickled estimator, 'compiled' the flattened NumPy forest
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "sklearn").lower()
+# Memory-mapping only shares memory for the compiled forest: sklearn's trees
+# copy their node arrays on unpickle, so it is off by default for them
+MODEL_MMAP = os.getenv("MODEL_MMAP", "true" if MODEL_BACKEND == 'compiled' else "false").lower() == "true"
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "false").lower() == "true"
+
+# Micro-batching of concurrent /api/predict calls (off = score each request directly)
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "false").lower() == "true"
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", 5))
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 64))
+
+# Write-behind for PredictionHistory: queue rows and insert them in batches off the request path
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "false").lower() == "true"
+HISTORY_FLUSH_ROWS = int(os.getenv("HISTORY_FLUSH_ROWS", 100))
+HISTORY_FLUSH_MS = float(os.getenv("HISTORY_FLUSH_MS", 500))
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", 10000))
+
+# Irrigation schedules: 'materialized' stores every future task row,
+# 'virtual' derives due dates on read and stores only completions
+SCHEDULE_MODE = os.getenv("SCHEDULE_MODE", "materialized").lower()
+
+# Background irrigation advice (weather alert, priority, pest risk)
+ADVICE_WORKER = os.getenv("ADVICE_WORKER", "false").lower() == "true"
+ADVICE_REFRESH_SECONDS = float(os.getenv("ADVICE_REFRESH_SECONDS", 600))
+ADVICE_STALE_SECONDS = float(os.getenv("ADVICE_STALE_SECONDS", 2 * ADVICE_REFRESH_SECONDS))
+
+# Authentication: 'db' loads the user row per request (optionally through a
+# TTL cache), 'claims' builds the identity from the verified JWT alone
+AUTH_MODE = os.getenv("AUTH_MODE", "db").lower()
+AUTH_CACHE = os.getenv("AUTH_CACHE", "false").lower() == "true"
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 60))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+# Conditional GET: optional cache of serialized read payloads, keyed by ETag
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "false").lower() == "true"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 300))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+
+# Bulk exports: rows fetched per round trip (server-side cursor on Postgres)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+# Model hot reload: admin endpoint (needs ADMIN_TOKEN) and/or a file watcher
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", 0))
+
 # Model Global Cache (Lazy Loading)
+# 'active' holds one complete model state (model, columns, layout, stats,
+# version) and is only ever replaced as a whole, so a request that read it
+# keeps a consistent model even if a reload swaps in a new one meanwhile
 _MODEL_CACHE = {
-    'model': None,
-    'columns': None
+    'active': None
 }
+_model_load_lock = threading.Lock()
 
 # --- DATABASE MODELS ---
 class User(db.Model):
@@ -58,7 +139,29 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+# Detached snapshot handed to handlers when auth is cached or claims-based
+AuthIdentity = namedtuple('AuthIdentity', ['id', 'username', 'email'])
+
+token_cache = TTLCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL if AUTH_CACHE else 0)
+user_cache = TTLCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL if AUTH_CACHE else 0)
+
+# Claims mode never reads the user row, so deletions are remembered for as
+# long as an already-issued token can live
+TOKEN_LIFETIME = timedelta(hours=24)
+deleted_users = TTLCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl=TOKEN_LIFETIME.total_seconds() if AUTH_MODE == 'claims' else 0)
+
+@event.listens_for(User, 'after_update')
+def invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+
+@event.listens_for(User, 'after_delete')
+def forget_deleted_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+    deleted_users.set(target.id, True)
+
 class PredictionHistory(db.Model):
+    __table_args__ = (db.Index('ix_prediction_history_user_date', 'user_id', 'date'),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -92,7 +195,9 @@ class PlantedCrop(db.Model):
     city = db.Column(db.String(100), default="Mumbai")
     category = db.Column(db.String(50), default="General")
     status = db.Column(db.String(20), default='growing')
+    virtual_schedule = db.Column(db.Boolean, nullable=False, default=False, server_default=false())
     tasks = db.relationship('IrrigationTask', backref='planted_crop', lazy=True, cascade="all, delete-orphan")
+    completions = db.relationship('IrrigationCompletion', backref='planted_crop', lazy=True, cascade="all, delete-orphan")
 
     def to_dict(self):
         return {
@@ -107,6 +212,8 @@ class PlantedCrop(db.Model):
         }
 
 class IrrigationTask(db.Model):
+    __table_args__ = (db.Index('ix_irrigation_task_user_due', 'user_id', 'due_date'),)
+
     id = db.Column(db.Integer, primary_key=True)
     planted_crop_id = db.Column(db.Integer, db.ForeignKey('planted_crop.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -123,54 +230,354 @@ class IrrigationTask(db.Model):
             'completed_at': self.completed_at.strftime('%Y-%m-%d %H:%M') if self.completed_at else None
         }
 
+class IrrigationCompletion(db.Model):
+    """Completion event for a virtual (computed-on-read) irrigation task."""
+    __table_args__ = (db.UniqueConstraint('planted_crop_id', 'due_date', name='uq_irrigation_completion_crop_due'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    planted_crop_id = db.Column(db.Integer, db.ForeignKey('planted_crop.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    due_date = db.Column(db.DateTime, nullable=False)
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ResourceVersion(db.Model):
+    """Per-user change counter for a cached read resource ('history', 'crops', 'tasks')."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    resource = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+def bump_versions(user_ids, *resources):
+    """Increments the users' resource versions in the current transaction; the caller commits."""
+    rows = [{'user_id': u, 'resource': r, 'version': 1} for u in set(user_ids) for r in resources]
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        upsert = (pg_insert if dialect == 'postgresql' else sqlite_insert)(ResourceVersion)
+        db.session.execute(upsert.on_conflict_do_update(
+            index_elements=['user_id', 'resource'],
+            set_={'version': ResourceVersion.version + 1}
+        ), rows)
+        return
+    for row in rows:
+        updated = ResourceVersion.query.filter_by(user_id=row['user_id'], resource=row['resource']) \
+            .update({ResourceVersion.version: ResourceVersion.version + 1})
+        if not updated:
+            db.session.add(ResourceVersion(**row))
+
+def load_versions(user_id, resources):
+    return dict(db.session.query(ResourceVersion.resource, ResourceVersion.version)
+                .filter(ResourceVersion.user_id == user_id, ResourceVersion.resource.in_(resources)).all())
+
+conditional_get = ConditionalGet(
+    load_versions,
+    payload_cache=TTLCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES, ttl=RESPONSE_CACHE_TTL) if RESPONSE_CACHE else None
+)
+
+def flush_history_rows(rows):
+    with app.app_context():
+        try:
+            db.session.execute(insert(PredictionHistory), rows)
+            # Bumped with the insert, so clients only revalidate once the rows are visible
+            bump_versions([r['user_id'] for r in rows], 'history')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+history_buffer = WriteBehindBuffer(
+    flush_history_rows,
+    flush_rows=HISTORY_FLUSH_ROWS,
+    flush_ms=HISTORY_FLUSH_MS,
+    max_queue=HISTORY_QUEUE_MAX
+)
+# Flush queued history on graceful shutdown
+atexit.register(history_buffer.close)
+
 # Initialize Database
 with app.app_context():
     db.create_all()
+    # create_all() never alters existing tables, so add columns introduced later
+    if 'virtual_schedule' not in {c['name'] for c in inspect(db.engine).get_columns('planted_crop')}:
+        with db.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE planted_crop ADD COLUMN virtual_schedule BOOLEAN NOT NULL DEFAULT FALSE"))
+    # create_all() skips tables that already exist, so add newer indexes explicitly
+    for table in (PredictionHistory.__table__, IrrigationTask.__table__):
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
 
 # --- HELPER: LAZY MODEL LOADER ---
+# Request field -> model column for the numeric features
+FEATURE_FIELDS = {
+    'Nitrogen': 'N',
+    'Phosphorous': 'P',
+    'Potassium': 'K',
+    'Temparature': 'temp',
+    'Humidity': 'humidity',
+    'Moisture': 'moisture',
+}
+
+def build_feature_layout(model_columns):
+    """
+    Precomputes where each input lands in the feature vector so inference
+    can fill a plain array instead of building a DataFrame per request.
+    """
+    col_index = {col: i for i, col in enumerate(model_columns)}
+    return {
+        'size': len(model_columns),
+        'numeric': [(col_index[col], field) for col, field in FEATURE_FIELDS.items() if col in col_index],
+        'soil': {col[len('Soil_'):]: i for col, i in col_index.items() if col.startswith('Soil_')}
+    }
+
+def load_model_state(path):
+    """Loads, validates and warms a model; returns its state dict without activating it."""
+    with span('load_ml_model'):
+        model_data, stats = load_model_bundle(path, use_mmap=MODEL_MMAP, backend=MODEL_BACKEND)
+    state = {
+        'model': model_data['model'],
+        'columns': model_data['columns'],
+        'layout': build_feature_layout(model_data['columns']),
+        'stats': stats,
+        'version': stats['version']
+    }
+    validate_model_state(state, previous=_MODEL_CACHE['active'])
+    return state
+
+def current_model():
+    """The active model state, loaded on first use."""
+    state = _MODEL_CACHE['active']
+    if state is None:
+        with _model_load_lock:
+            if _MODEL_CACHE['active'] is None:
+                print("🚀 [System] Loading AI Model (96MB)... This happens only once.")
+                try:
+                    _MODEL_CACHE['active'] = load_model_state(MODEL_PATH)
+                except Exception as e:
+                    print(f"❌ [System] Error loading model: {e}")
+                    raise e
+                stats = _MODEL_CACHE['active']['stats']
+                print(f"✅ [System] Model {stats['version']} loaded in {stats['load_seconds']}s (RSS {stats['rss_mb']} MB, backend={stats['backend']}, mmap={stats['mmap']}).")
+            state = _MODEL_CACHE['active']
+    return state
+
 def load_ml_model():
-    if _MODEL_CACHE['model'] is None:
-        print("🚀 [System] Loading AI Model (96MB)... This happens only once.")
-        try:
-            model_data = joblib.load('Models/crop_recommendation_model.pkl')
-            _MODEL_CACHE['model'] = model_data['model']
-            _MODEL_CACHE['columns'] = model_data['columns']
-            print("✅ [System] Model loaded successfully.")
-        except Exception as e:
-            print(f"❌ [System] Error loading model: {e}")
-            raise e
-    return _MODEL_CACHE['model'], _MODEL_CACHE['columns']
+    state = current_model()
+    return state['model'], state['columns']
+
+def reload_model(force=False):
+    """
+    Loads MODEL_PATH next to the active model and swaps it in once it has
+    passed validation. Requests already holding the old state finish on it.
+    Returns False if the file is already the active version.
+    """
+    active = _MODEL_CACHE['active']
+    if not force and active is not None and model_version(MODEL_PATH) == active['version']:
+        print(f"ℹ️ [Model] {MODEL_PATH} is already the active version ({active['version']}).")
+        return False
+    print(f"🔄 [Model] Loading {MODEL_PATH} in the background...")
+    state = load_model_state(MODEL_PATH)
+    with _model_load_lock:
+        _MODEL_CACHE['active'] = state
+    previous = active['version'] if active else None
+    print(f"✅ [Model] Swapped {previous} -> {state['version']} (loaded in {state['stats']['load_seconds']}s).")
+    return True
+
+model_reloader = ModelReloader(reload_model, MODEL_PATH, watch_interval=MODEL_WATCH_SECONDS)
+
+def build_feature_row(sample, layout):
+    """Single-row fast path: fills a (1, n_columns) array from one sample."""
+    x = np.zeros((1, layout['size']), dtype=np.float64)
+    for i, field in layout['numeric']:
+        x[0, i] = float(sample[field])
+    soil_i = layout['soil'].get(sample.get('soil_type'))
+    if soil_i is not None:
+        x[0, soil_i] = 1.0
+    return x
+
+def build_feature_matrix(samples, layout):
+    """
+    Builds one (n_samples, n_columns) float matrix in model column order.
+    Each sample needs N, P, K, temp, humidity, moisture and soil_type.
+    """
+    X = np.zeros((len(samples), layout['size']), dtype=np.float64)
+
+    for i, field in layout['numeric']:
+        X[:, i] = [float(s[field]) for s in samples]
+
+    soil_idx = [layout['soil'].get(s.get('soil_type')) for s in samples]
+    rows = [r for r, c in enumerate(soil_idx) if c is not None]
+    X[rows, [soil_idx[r] for r in rows]] = 1.0
+    return X
+
+def validation_samples(layout, n=64, seed=0):
+    """Plausible random inputs covering every soil type, for checking a freshly loaded model."""
+    rng = np.random.default_rng(seed)
+    soils = sorted(layout['soil']) or [None]
+    return [{
+        'N': rng.uniform(0, 140), 'P': rng.uniform(5, 145), 'K': rng.uniform(5, 205),
+        'temp': rng.uniform(8, 44), 'humidity': rng.uniform(14, 100), 'moisture': rng.uniform(0, 100),
+        'soil_type': soils[i % len(soils)]
+    } for i in range(n)]
+
+def validate_model_state(state, previous=None):
+    """
+    Scores a sample batch with the new model (which also warms it up) and
+    raises ValueError if the output isn't a sane probability matrix. Top-1
+    agreement with the previous model is recorded in its stats.
+    """
+    layout = state['layout']
+    if not layout['numeric']:
+        raise ValueError("Model columns contain none of the expected input features")
+    classes = getattr(state['model'], 'classes_', None)
+    if classes is None or len(classes) == 0:
+        raise ValueError("Model has no classes")
+
+    X = build_feature_matrix(validation_samples(layout), layout)
+    probs = np.asarray(predict_matrix(state['model'], X))
+    if probs.shape != (len(X), len(classes)):
+        raise ValueError(f"predict_proba returned shape {probs.shape}, expected {(len(X), len(classes))}")
+    if not np.isfinite(probs).all() or not np.allclose(probs.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("predict_proba rows are not valid probability distributions")
+
+    if previous is not None:
+        new_top = np.asarray(classes)[probs.argmax(axis=1)]
+        Xp = build_feature_matrix(validation_samples(previous['layout']), previous['layout'])
+        old_top = np.asarray(previous['model'].classes_)[predict_matrix(previous['model'], Xp).argmax(axis=1)]
+        state['stats']['agreement_with_previous'] = round(float((new_top == old_top).mean()), 3)
+
+def predict_matrix(model, X):
+    # Model was fitted on a DataFrame; scoring a bare array is intentional here
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        return model.predict_proba(X)
+
+def top_alternatives(probs, classes, k=3):
+    """Top-k crops per row of a probability matrix, best first."""
+    top_k = np.argsort(probs, axis=1)[:, -k:][:, ::-1]
+    return [
+        [{"crop": classes[i], "confidence": float(round(row[i] * 100, 1))} for i in idx]
+        for row, idx in zip(probs, top_k)
+    ]
+
+def rank_crops(X, state=None):
+    """Scores a feature matrix directly; returns the top alternatives per row."""
+    model = (state or current_model())['model']
+    return top_alternatives(predict_matrix(model, X), model.classes_)
+
+inference_batcher = InferenceBatcher(rank_crops, window_ms=INFERENCE_BATCH_WINDOW_MS, max_batch=INFERENCE_MAX_BATCH)
+
+def rank_crops_shared(x, state):
+    """Per-request scoring: coalesced with concurrent requests on the same model when batching is on."""
+    if INFERENCE_BATCHING:
+        return inference_batcher.submit(x, state)
+    return rank_crops(x, state)
+
+# --- CROP KNOWLEDGE BASE ---
+# Growing duration (days), irrigation frequency (days) and category per crop
+CROP_METADATA = {
+    'rice': {'duration': 120, 'freq': 2, 'cat': 'Cereals'},
+    'maize': {'duration': 100, 'freq': 4, 'cat': 'Cereals'},
+    'wheat': {'duration': 130, 'freq': 7, 'cat': 'Cereals'},
+    'cotton': {'duration': 180, 'freq': 10, 'cat': 'Fiber'},
+    'jute': {'duration': 120, 'freq': 5, 'cat': 'Fiber'},
+    'coffee': {'duration': 365, 'freq': 14, 'cat': 'Beverage'},
+    'banana': {'duration': 300, 'freq': 3, 'cat': 'Fruits'},
+    'mango': {'duration': 180, 'freq': 12, 'cat': 'Fruits'},
+    'grapes': {'duration': 150, 'freq': 4, 'cat': 'Fruits'},
+    'watermelon': {'duration': 90, 'freq': 2, 'cat': 'Fruits'},
+    'lentil': {'duration': 110, 'freq': 8, 'cat': 'Pulses'},
+    'chickpea': {'duration': 120, 'freq': 10, 'cat': 'Pulses'},
+}
+DEFAULT_CROP_INFO = {'duration': 90, 'freq': 3, 'cat': 'General'}
 
 # --- PEST & DISEASE KNOWLEDGE BASE ---
+# Rule table compiled once at startup (see Utils.pest_rules); a JSON file in
+# the same format can replace the built-in rules
+PEST_RULES_PATH = os.getenv("PEST_RULES_PATH")
+pest_engine = PestRuleEngine.from_file(PEST_RULES_PATH) if PEST_RULES_PATH else PestRuleEngine(DEFAULT_PEST_RULES)
+
 def assess_pest_risk(crop, temp, hum):
-    risk = {"level": "Low", "msg": "No immediate threats detected."}
-    crop = crop.lower()
-    
-    if 'rice' in crop:
-        if hum > 85 and 25 <= temp <= 32:
-            risk = {"level": "High", "msg": "Potential Blast Disease risk due to extreme humidity."}
-    elif 'maize' in crop:
-        if temp > 32 and hum > 70:
-            risk = {"level": "Moderate", "msg": "Watch for Stem Borer activity in warm weather."}
-    elif 'wheat' in crop:
-        if 15 <= temp <= 25 and hum > 80:
-            risk = {"level": "Moderate", "msg": "Check for Leaf Rust development in damp conditions."}
-    elif 'cotton' in crop:
-        if temp > 30 and hum > 60:
-            risk = {"level": "Moderate", "msg": "Potential Pink Bollworm threat in heat."}
-    elif 'grapes' in crop or 'mango' in crop:
-        if hum > 75:
-            risk = {"level": "Moderate", "msg": "Downy Mildew risk: Avoid leaf moisture."}
-    elif 'ground nut' in crop or 'peanut' in crop:
-        if hum > 80 and temp < 25:
-            risk = {"level": "Moderate", "msg": "Risk of Tikka Leaf Spot in cool, damp weather."}
-    elif 'lentil' in crop or 'chickpea' in crop:
-        if hum > 70:
-            risk = {"level": "Moderate", "msg": "Monitor for Root Rot in overly moist soil."}
-            
-    return risk
+    return pest_engine.assess(crop, temp, hum)
+
+# --- IRRIGATION ADVICE ---
+def build_weather_advice(weather, city):
+    """Weather alert and priority for one city (pest risk is added per crop)."""
+    advice = {}
+    if not weather:
+        return advice
+
+    # Logic: If it's raining or very humid, suggest a delay
+    desc = weather.get('description', '').lower()
+    humidity = weather.get('humidity', 0)
+
+    if 'rain' in desc or humidity > 85:
+        advice['weather_alert'] = f"Suggested Skip: {desc.capitalize()} detected in {city}"
+        advice['priority'] = 'low'
+    elif weather.get('temp', 0) > 35:
+        advice['weather_alert'] = "High Heat: Increase water volume"
+        advice['priority'] = 'high'
+    else:
+        advice['priority'] = 'normal'
+    return advice
+
+def build_advice_map(pairs, weather):
+    """
+    Advice for each distinct (city, crop) pair, keyed by that pair. Pest risk
+    for all pairs with weather is scored in one vectorized pass.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    scored = [(city, crop) for city, crop in pairs if weather.get(city)]
+    risks = pest_engine.assess_batch(
+        [crop for _, crop in scored],
+        [weather[city].get('temp', 0) for city, _ in scored],
+        [weather[city].get('humidity', 0) for city, _ in scored]
+    )
+
+    by_city = {}
+    advice = {pair: {} for pair in pairs}
+    for (city, crop), risk in zip(scored, risks):
+        if city not in by_city:
+            by_city[city] = build_weather_advice(weather[city], city)
+        # Integrated Pest Warning
+        advice[(city, crop)] = {**by_city[city], 'pest_risk': risk}
+    return advice
+
+def compute_crop_advice():
+    """Advice for every distinct (city, crop) currently growing, keyed by that pair."""
+    with app.app_context():
+        pairs = db.session.query(PlantedCrop.city, PlantedCrop.crop_name) \
+            .filter(PlantedCrop.status == 'growing').distinct().all()
+    weather = get_weather_many([city for city, _ in pairs], WEATHER_API_KEY)
+    return build_advice_map([(city, crop) for city, crop in pairs], weather)
+
+advice_worker = AdviceWorker(compute_crop_advice, interval=ADVICE_REFRESH_SECONDS, stale_after=ADVICE_STALE_SECONDS)
 
 # --- AUTH DECORATOR ---
+def verify_token(token):
+    """Decoded JWT claims, from the verified-token cache when enabled."""
+    data = token_cache.get(token)
+    if data is None:
+        data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+        # Never keep a token cached past its own expiry
+        token_cache.set(token, data, ttl=data['exp'] - time.time() if 'exp' in data else None)
+    return data
+
+def load_current_user(data):
+    """The authenticated user for these claims, or None if it no longer exists."""
+    if AUTH_MODE == 'claims':
+        if deleted_users.get(data['user_id']):
+            return None
+        return AuthIdentity(data['user_id'], data.get('username'), None)
+    if not AUTH_CACHE:
+        return User.query.get(data['user_id'])
+
+    identity = user_cache.get(data['user_id'])
+    if identity is None:
+        user = User.query.get(data['user_id'])
+        if user is None:
+            return None
+        identity = AuthIdentity(user.id, user.username, user.email)
+        user_cache.set(user.id, identity)
+    return identity
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -181,10 +588,13 @@ def token_required(f):
         try:
             if "Bearer " in token:
                 token = token.split(" ")[1]
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.get(data['user_id'])
+            with span('auth'):
+                data = verify_token(token)
+                current_user = load_current_user(data)
         except Exception as e:
             return jsonify({'error': 'Token is invalid!', 'msg': str(e)}), 401
+        if current_user is None:
+            return jsonify({'error': 'Token is invalid!', 'msg': 'User not found'}), 401
         
         return f(current_user, *args, **kwargs)
     return decorated
@@ -220,7 +630,8 @@ def login():
     if user and user.check_password(data['password']):
         token = jwt.encode({
             'user_id': user.id,
-            'exp': datetime.utcnow() + timedelta(hours=24)
+            'username': user.username,
+            'exp': datetime.utcnow() + TOKEN_LIFETIME
         }, app.config['SECRET_KEY'], algorithm="HS256")
         
         return jsonify({
@@ -232,26 +643,51 @@ def login():
 
 @app.route('/api/history', methods=['GET'])
 @token_required
+@conditional_get('history')
 def get_user_history(current_user):
-    history = PredictionHistory.query.filter_by(user_id=current_user.id).order_by(PredictionHistory.date.desc()).all()
-    return jsonify([h.to_dict() for h in history])
+    query = PredictionHistory.query.filter_by(user_id=current_user.id)
+    try:
+        query = query.filter(*date_window(
+            PredictionHistory.date,
+            parse_date(request.args.get('from'), 'from'),
+            parse_date(request.args.get('to'), 'to')
+        ))
+        crop = request.args.get('crop')
+        if crop:
+            query = query.filter(func.lower(PredictionHistory.predicted_crop) == crop.lower())
+        limit, cursor = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    with span('db'):
+        history, next_cursor = paginate(query, PredictionHistory.date, PredictionHistory.id, limit, cursor, descending=True)
+    with span('serialize'):
+        response = jsonify([h.to_dict() for h in history])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @app.route('/api/stats', methods=['GET'])
 @token_required
+@conditional_get('history')
 def get_user_stats(current_user):
-    user_predictions = PredictionHistory.query.filter_by(user_id=current_user.id).all()
-    count = len(user_predictions)
-    
+    # Single aggregate pass: per-crop count and confidence sum, totals derived from those
+    with span('db'):
+        per_crop = db.session.query(
+            PredictionHistory.predicted_crop,
+            func.count(PredictionHistory.id),
+            func.sum(PredictionHistory.confidence),
+            func.min(PredictionHistory.id)
+        ).filter(PredictionHistory.user_id == current_user.id) \
+            .group_by(PredictionHistory.predicted_crop).all()
+
+    count = sum(row[1] for row in per_crop)
     if count == 0:
         return jsonify({"count": 0, "most_recommended": "N/A", "avg_confidence": 0})
-    
-    crop_counts = {}
-    total_conf = 0
-    for p in user_predictions:
-        crop_counts[p.predicted_crop] = crop_counts.get(p.predicted_crop, 0) + 1
-        total_conf += p.confidence
-    
-    most_recommended = max(crop_counts, key=crop_counts.get)
+
+    total_conf = sum(row[2] or 0 for row in per_crop)
+    # Ties go to the crop that was recommended first
+    most_recommended = min(per_crop, key=lambda row: (-row[1], row[3]))[0]
     return jsonify({
         "count": count,
         "most_recommended": most_recommended,
@@ -266,12 +702,13 @@ def predict(current_user):
         if not data:
              return jsonify({"error": "No input data provided"}), 400
         
-        # Lazy load model only when needed
-        model, model_columns = load_ml_model()
+        # Lazy load model only when needed; this request sticks to the version it got here
+        model_state = current_model()
 
         # 1. Weather Logic
         city = data.get('city')
-        weather = get_weather(city, WEATHER_API_KEY)
+        with span('weather'):
+            weather = get_weather(city, WEATHER_API_KEY)
         
         if weather:
             current_temp = weather['temp']
@@ -281,61 +718,253 @@ def predict(current_user):
             current_humidity = float(data.get('humidity', 50))
 
         # 2. Prepare Input
-        input_df = pd.DataFrame(columns=model_columns)
-        input_df.loc[0] = 0 
-        input_df['Nitrogen'] = data.get('N')
-        input_df['Phosphorous'] = data.get('P')
-        input_df['Potassium'] = data.get('K')
-        input_df['Temparature'] = current_temp
-        input_df['Humidity'] = current_humidity
-        input_df['Moisture'] = data.get('moisture')
-        
-        soil_col = f"Soil_{data.get('soil_type')}"
-        if soil_col in input_df.columns:
-            input_df[soil_col] = 1
+        with span('features'):
+            x = build_feature_row({
+                **data,
+                'temp': current_temp,
+                'humidity': current_humidity
+            }, model_state['layout'])
 
         # 3. Predict
-        probs = model.predict_proba(input_df)[0]
-        classes = model.classes_
-        top_3_indices = probs.argsort()[-3:][::-1]
-        
-        alternatives = []
-        for index in top_3_indices:
-            alternatives.append({
-                "crop": classes[index],
-                "confidence": float(round(probs[index] * 100, 1))
-            })
-            
+        with span('inference'):
+            alternatives = rank_crops_shared(x, model_state)[0]
+
         best_crop = alternatives[0]['crop']
         best_confidence = alternatives[0]['confidence']
 
-        # 4. Save to History
-        new_history = PredictionHistory(
-            user_id=current_user.id,
-            city=city,
-            nitrogen=data['N'],
-            phosphorus=data['P'],
-            potassium=data['K'],
-            moisture=data['moisture'],
-            soil_type=data['soil_type'],
-            predicted_crop=best_crop,
-            confidence=best_confidence
-        )
-        db.session.add(new_history)
-        db.session.commit()
+        # 4. Save to History (queued when write-behind is on; synchronous otherwise or when the queue is full)
+        history_row = {
+            'user_id': current_user.id,
+            'date': datetime.utcnow(),
+            'city': city,
+            'nitrogen': data['N'],
+            'phosphorus': data['P'],
+            'potassium': data['K'],
+            'moisture': data['moisture'],
+            'soil_type': data['soil_type'],
+            'predicted_crop': best_crop,
+            'confidence': best_confidence
+        }
+        with span('db'):
+            if not (HISTORY_WRITE_BEHIND and history_buffer.put(history_row)):
+                db.session.add(PredictionHistory(**history_row))
+                bump_versions([current_user.id], 'history')
+                db.session.commit()
 
-        return jsonify({
-            "recommended_crop": best_crop,
-            "alternatives": alternatives,
-            "weather_used": { "temp": current_temp, "humidity": current_humidity }
-        })
+        with span('serialize'):
+            return jsonify({
+                "recommended_crop": best_crop,
+                "alternatives": alternatives,
+                "weather_used": { "temp": current_temp, "humidity": current_humidity },
+                "model_version": model_state['version']
+            })
 
     except Exception as e:
         print(f"Prediction Error: {e}")
         return jsonify({"error": str(e)}), 400
 
+@app.route('/api/predict/batch', methods=['POST'])
+@token_required
+def predict_batch(current_user):
+    try:
+        data = request.json
+        samples = data.get('samples') if isinstance(data, dict) else data
+        if not samples or not isinstance(samples, list):
+            return jsonify({"error": "Expected a non-empty list of samples"}), 400
+
+        required = ('N', 'P', 'K', 'moisture', 'soil_type')
+        for i, s in enumerate(samples):
+            missing = [f for f in required if s.get(f) is None]
+            if missing:
+                return jsonify({"error": f"Sample {i} is missing {', '.join(missing)}"}), 400
+
+        model_state = current_model()
+
+        # 1. Weather Logic (one concurrent lookup per distinct city)
+        with span('weather'):
+            weather_by_city = get_weather_many([s.get('city') for s in samples], WEATHER_API_KEY)
+
+        rows = []
+        for s in samples:
+            weather = weather_by_city.get(s.get('city'))
+            if weather:
+                temp, humidity = weather['temp'], weather['humidity']
+            else:
+                temp, humidity = float(s.get('temp', 25)), float(s.get('humidity', 50))
+            rows.append({**s, 'temp': temp, 'humidity': humidity})
+
+        # 2. Predict in a single call
+        with span('features'):
+            X = build_feature_matrix(rows, model_state['layout'])
+        with span('inference'):
+            all_alternatives = rank_crops(X, model_state)
+
+        # 3. Save to History in one bulk insert
+        history_rows = []
+        results = []
+        for r, alternatives in zip(rows, all_alternatives):
+            best = alternatives[0]
+            history_rows.append({
+                'user_id': current_user.id,
+                'city': r.get('city'),
+                'nitrogen': r['N'],
+                'phosphorus': r['P'],
+                'potassium': r['K'],
+                'moisture': r['moisture'],
+                'soil_type': r['soil_type'],
+                'predicted_crop': best['crop'],
+                'confidence': best['confidence'],
+            })
+            results.append({
+                "recommended_crop": best['crop'],
+                "alternatives": alternatives,
+                "weather_used": {"temp": r['temp'], "humidity": r['humidity']}
+            })
+
+        with span('db'):
+            db.session.execute(insert(PredictionHistory), history_rows)
+            bump_versions([current_user.id], 'history')
+            db.session.commit()
+
+        with span('serialize'):
+            return jsonify({"count": len(results), "results": results, "model_version": model_state['version']})
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Batch Prediction Error: {e}")
+        return jsonify({"error": str(e)}), 400
+
+# --- FERTILIZER CALCULATOR ---
+# Ideal N/P/K table, built from the processed crop rules on first use
+_CROP_NUTRIENTS = {'table': None}
+
+def get_crop_nutrients():
+    if _CROP_NUTRIENTS['table'] is None:
+        _CROP_NUTRIENTS['table'] = CropNutrientTable.load()
+        print(f"🧪 [System] Loaded ideal N/P/K for {len(_CROP_NUTRIENTS['table'])} crops.")
+    return _CROP_NUTRIENTS['table']
+
+def calculate_fertilizer(fields):
+    """
+    Fertilizer needs for many fields in one vectorized pass. Each field has
+    crop, N, P, K (current soil levels, kg/ha), size and unit. Raises
+    ValueError naming the first invalid field.
+    """
+    table = get_crop_nutrients()
+    for i, f in enumerate(fields):
+        if not isinstance(f, dict) or not f.get('crop'):
+            raise ValueError(f"Field {i}: missing crop")
+        if normalize_unit(f.get('unit')) is None:
+            raise ValueError(f"Field {i}: unknown unit '{f.get('unit')}' (use acre, hectare or guntha)")
+
+    try:
+        soil = np.array([[float(f.get(k) or 0) for k in ('N', 'P', 'K')] for f in fields], dtype=np.float64)
+        sizes = np.array([float(f.get('size', 1)) for f in fields], dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("N, P, K and size must be numbers")
+    # float() accepts "nan" and "inf", which would serialize as invalid JSON
+    if not np.isfinite(soil).all():
+        raise ValueError(f"Field {int(np.argmax(~np.isfinite(soil).all(axis=1)))}: N, P and K must be finite numbers")
+    if not np.isfinite(sizes).all():
+        raise ValueError(f"Field {int(np.argmax(~np.isfinite(sizes)))}: size must be a finite number")
+    if (sizes <= 0).any():
+        raise ValueError(f"Field {int(np.argmax(sizes <= 0))}: size must be positive")
+
+    idx = table.lookup([f['crop'] for f in fields])
+    if (idx < 0).any():
+        i = int(np.argmax(idx < 0))
+        raise ValueError(f"Field {i}: no nutrient data for crop '{fields[i]['crop']}'")
+
+    units = [normalize_unit(f.get('unit')) for f in fields]
+    hectares = sizes * np.array([HECTARES_PER_UNIT[u] for u in units])
+    ideal = table.ideal[idx]
+    req = fertilizer_requirements(ideal, soil, hectares)
+
+    results = []
+    for i, f in enumerate(fields):
+        results.append({
+            "crop": table.names[idx[i]],
+            "size": sizes[i].item(),
+            "unit": units[i],
+            "area_hectares": round(hectares[i].item(), 4),
+            "ideal_npk": dict(zip('NPK', ideal[i].tolist())),
+            "nutrient_gap": dict(zip('NPK', np.round(req['gap'][i], 1).tolist())),
+            "fertilizer_kg": dict(zip(('urea', 'dap', 'mop'), np.round(req['kg'][i], 1).tolist())),
+            "bags": dict(zip(('urea', 'dap', 'mop'), req['bags'][i].tolist()))
+        })
+    return results
+
+@app.route('/api/fertilizer', methods=['POST'])
+@token_required
+def fertilizer(current_user):
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    try:
+        return jsonify(calculate_fertilizer([data])[0])
+    except ValueError as e:
+        return jsonify({"error": str(e).removeprefix('Field 0: ')}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Crop rules not built yet; run python Utils/data_cleaner.py"}), 503
+
+@app.route('/api/fertilizer/batch', methods=['POST'])
+@token_required
+def fertilizer_batch(current_user):
+    data = request.json
+    fields = data.get('fields') if isinstance(data, dict) else data
+    if not fields or not isinstance(fields, list):
+        return jsonify({"error": "Expected a non-empty list of fields"}), 400
+    try:
+        results = calculate_fertilizer(fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Crop rules not built yet; run python Utils/data_cleaner.py"}), 503
+    return jsonify({"count": len(results), "results": results})
+
 # --- IRRIGATION & PLANTING ROUTES ---
 
+def plant_crops(user_id, entries):
+    """
+    Creates PlantedCrop rows and their irrigation schedules for many
+    (crop_name, city, planting_date) entries. Tasks for every crop go out in
+    a single bulk insert; the caller commits. In virtual schedule mode no
+    task rows are written at all.
+    """
+    virtual = SCHEDULE_MODE == 'virtual'
+    plants = []
+    for entry in entries:
+        crop_name = entry['crop_name']
+        info = CROP_METADATA.get(crop_name.lower(), DEFAULT_CROP_INFO)
+        custom_date = entry.get('planting_date')
+        planting_date = datetime.strptime(custom_date, '%Y-%m-%d') if custom_date else datetime.utcnow()
+
+        plants.append(PlantedCrop(
+            user_id=user_id,
+            crop_name=crop_name,
+            city=entry.get('city', 'Mumbai'),
+            category=info['cat'],
+            planting_date=planting_date,
+            harvest_date=planting_date + timedelta(days=info['duration']),
+            irrigation_frequency_days=info['freq'],
+            virtual_schedule=virtual
+        ))
+    db.session.add_all(plants)
+    with span('db'):
+        db.session.flush()
+
+    # Generate Irrigation Tasks
+    task_rows = [
+        {'planted_crop_id': p.id, 'user_id': user_id, 'due_date': due_date, 'completed': False}
+        for p in plants if not p.virtual_schedule
+        for due_date in irrigation_due_dates(p.planting_date, p.harvest_date, p.irrigation_frequency_days)
+    ]
+    if task_rows:
+        with span('db'):
+            db.session.execute(insert(IrrigationTask), task_rows)
+    bump_versions([user_id], 'crops', 'tasks')
+    return plants
+
 @app.route('/api/plant', methods=['POST'])
 @token_required
 def plant_crop(current_user):
@@ -343,122 +972,215 @@ def plant_crop(current_user):
         data = request.json
         crop_name = data.get('crop_name')
         city = data.get('city', 'Mumbai')
-        custom_date = data.get('planting_date')
-        
-        # Enhanced Crop Metadata
-        crop_metadata = {
-            'rice': {'duration': 120, 'freq': 2, 'cat': 'Cereals'},
-            'maize': {'duration': 100, 'freq': 4, 'cat': 'Cereals'},
-            'wheat': {'duration': 130, 'freq': 7, 'cat': 'Cereals'},
-            'cotton': {'duration': 180, 'freq': 10, 'cat': 'Fiber'},
-            'jute': {'duration': 120, 'freq': 5, 'cat': 'Fiber'},
-            'coffee': {'duration': 365, 'freq': 14, 'cat': 'Beverage'},
-            'banana': {'duration': 300, 'freq': 3, 'cat': 'Fruits'},
-            'mango': {'duration': 180, 'freq': 12, 'cat': 'Fruits'},
-            'grapes': {'duration': 150, 'freq': 4, 'cat': 'Fruits'},
-            'watermelon': {'duration': 90, 'freq': 2, 'cat': 'Fruits'},
-            'lentil': {'duration': 110, 'freq': 8, 'cat': 'Pulses'},
-            'chickpea': {'duration': 120, 'freq': 10, 'cat': 'Pulses'},
-        }
-        
-        info = crop_metadata.get(crop_name.lower(), {'duration': 90, 'freq': 3, 'cat': 'General'})
-        
-        planting_date = datetime.strptime(custom_date, '%Y-%m-%d') if custom_date else datetime.utcnow()
-        harvest_date = planting_date + timedelta(days=info['duration'])
-        
-        new_plant = PlantedCrop(
-            user_id=current_user.id,
-            crop_name=crop_name,
-            city=city,
-            category=info['cat'],
-            planting_date=planting_date,
-            harvest_date=harvest_date,
-            irrigation_frequency_days=info['freq']
-        )
-        db.session.add(new_plant)
-        db.session.commit()
-        
-        # Generate Irrigation Tasks
-        current_task_date = planting_date + timedelta(days=info['freq'])
-        while current_task_date < harvest_date:
-            task = IrrigationTask(
-                planted_crop_id=new_plant.id,
-                user_id=current_user.id,
-                due_date=current_task_date
-            )
-            db.session.add(task)
-            current_task_date += timedelta(days=info['freq'])
-        
+
+        new_plant = plant_crops(current_user.id, [{
+            'crop_name': crop_name,
+            'city': city,
+            'planting_date': data.get('planting_date')
+        }])[0]
         db.session.commit()
+        # New (city, crop) pairs get advice on the next worker pass; run it now
+        if advice_worker.running:
+            advice_worker.trigger()
         return jsonify({"message": f"Successfully planted {crop_name} in {city}!", "crop": new_plant.to_dict()}), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/plant/batch', methods=['POST'])
+@token_required
+def plant_crop_batch(current_user):
+    data = request.json
+    entries = data.get('crops') if isinstance(data, dict) else data
+    if not entries or not isinstance(entries, list):
+        return jsonify({"error": "Expected a non-empty list of crops"}), 400
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get('crop_name'):
+            return jsonify({"error": f"Entry {i} is missing crop_name"}), 400
+
+    try:
+        # All fields land in one transaction: either every crop is planted or none
+        plants = plant_crops(current_user.id, entries)
+        db.session.commit()
+        if advice_worker.running:
+            advice_worker.trigger()
+        return jsonify({"message": f"Successfully planted {len(plants)} crops!", "crops": [p.to_dict() for p in plants]}), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+def virtual_task_dict(crop, occurrence, due_date, completed_at):
+    # Same shape as IrrigationTask.to_dict()
+    return {
+        'id': encode_virtual_task_id(crop.id, occurrence),
+        'crop_name': crop.crop_name,
+        'due_date': due_date.strftime('%Y-%m-%d'),
+        'completed': completed_at is not None,
+        'completed_at': completed_at.strftime('%Y-%m-%d %H:%M') if completed_at else None
+    }
+
+def list_virtual_tasks(user_id, completed=None, due_from=None, due_to=None, crop=None, cursor=None):
+    """
+    Derives task entries for the user's virtual-schedule crops, applying the
+    same filters and keyset cursor as the SQL path. Returns a list of
+    (due_date, id, task_dict, city, crop_name) tuples.
+    """
+    # Crops and their completions in one round trip (a crop row per completion)
+    rows_query = db.session.query(PlantedCrop, IrrigationCompletion.due_date, IrrigationCompletion.completed_at) \
+        .outerjoin(IrrigationCompletion, IrrigationCompletion.planted_crop_id == PlantedCrop.id) \
+        .filter(PlantedCrop.user_id == user_id, PlantedCrop.virtual_schedule.is_(True))
+    if crop:
+        rows_query = rows_query.filter(func.lower(PlantedCrop.crop_name) == crop.lower())
+
+    crops, done = {}, {}
+    for c, done_due, completed_at in rows_query:
+        crops[c.id] = c
+        if done_due is not None:
+            done[(c.id, done_due)] = completed_at
+    if not crops:
+        return []
+    crops = list(crops.values())
+
+    due_end = due_to + timedelta(days=1) if due_to else None
+
+    entries = []
+    for c in crops:
+        if not c.harvest_date:
+            continue
+        for occurrence, due_date in enumerate(irrigation_due_dates(c.planting_date, c.harvest_date, c.irrigation_frequency_days), start=1):
+            task_id = encode_virtual_task_id(c.id, occurrence)
+            if (due_from and due_date < due_from) or (due_end and due_date >= due_end):
+                continue
+            if cursor and (due_date, task_id) <= cursor:
+                continue
+            completed_at = done.get((c.id, due_date))
+            if completed is not None and completed != (completed_at is not None):
+                continue
+            entries.append((due_date, task_id, virtual_task_dict(c, occurrence, due_date, completed_at), c.city, c.crop_name))
+    return entries
+
+def advice_snapshot_tag():
+    """Task advice is versionable only when it comes from the worker's snapshot."""
+    return str(advice_worker.updated_at) if advice_worker.running else None
+
+def advice_headers():
+    age = advice_worker.age()
+    return {
+        'X-Advice-Age': str(int(age)) if age is not None else 'none',
+        'X-Advice-Stale': 'true' if advice_worker.is_stale() else 'false'
+    }
+
 @app.route('/api/tasks', methods=['GET'])
 @token_required
+@conditional_get('tasks', tag=advice_snapshot_tag, headers=advice_headers)
 def get_tasks(current_user):
-    # Get uncompleted tasks
-    tasks = IrrigationTask.query.filter_by(user_id=current_user.id).all()
-    
-    # Simple Smart Adjustment based on current weather
-    # In a real app, we'd cache this or run it as a background worker
-    adjusted_tasks = []
-    
-    # Keep track of cities we've already checked weather for in this request
-    weather_cache = {}
+    # Optional filters (?completed=, ?due_from=, ?due_to=, ?crop=) and keyset paging (?limit=, ?cursor=)
+    # One round trip: join the crop and populate task.planted_crop from the same rows.
+    # Each row also says whether the user has any virtual-schedule crops, so the
+    # virtual lookup is skipped without another query when they don't.
+    virtual_crop = aliased(PlantedCrop)
+    has_virtual = select(virtual_crop.id) \
+        .where(virtual_crop.user_id == current_user.id, virtual_crop.virtual_schedule.is_(True)).exists()
+    query = IrrigationTask.query.join(IrrigationTask.planted_crop) \
+        .options(contains_eager(IrrigationTask.planted_crop)) \
+        .add_columns(has_virtual.label('has_virtual')) \
+        .filter(IrrigationTask.user_id == current_user.id)
+    try:
+        completed = parse_bool(request.args.get('completed'), 'completed')
+        if completed is not None:
+            query = query.filter(IrrigationTask.completed == completed)
+        due_from = parse_date(request.args.get('due_from'), 'due_from')
+        due_to = parse_date(request.args.get('due_to'), 'due_to')
+        query = query.filter(*date_window(IrrigationTask.due_date, due_from, due_to))
+        crop = request.args.get('crop')
+        if crop:
+            query = query.filter(func.lower(PlantedCrop.crop_name) == crop.lower())
+        limit, cursor = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    for t in tasks:
-        if not t.planted_crop:
-            continue
-            
-        task_dict = t.to_dict()
-        city = t.planted_crop.city
-        
-        if city not in weather_cache:
-            weather = get_weather(city, WEATHER_API_KEY)
-            weather_cache[city] = weather
-            
-        weather = weather_cache[city]
-        
-        # Logic: If it's raining or very humid, suggest a delay
-        if weather:
-            desc = weather.get('description', '').lower()
-            humidity = weather.get('humidity', 0)
-            
-            if 'rain' in desc or humidity > 85:
-                task_dict['weather_alert'] = f"Suggested Skip: {desc.capitalize()} detected in {city}"
-                task_dict['priority'] = 'low'
-            elif weather.get('temp', 0) > 35:
-                task_dict['weather_alert'] = "High Heat: Increase water volume"
-                task_dict['priority'] = 'high'
-            else:
-                task_dict['priority'] = 'normal'
-            
-            # Integrated Pest Warning
-            pest_info = assess_pest_risk(t.planted_crop.crop_name, weather.get('temp', 0), humidity)
-            task_dict['pest_risk'] = pest_info
-        
+    with span('db'):
+        rows, next_cursor = paginate(query, IrrigationTask.due_date, IrrigationTask.id, limit, cursor,
+                                     key=lambda r: (r[0].due_date, r[0].id))
+        entries = [(t.due_date, t.id, t.to_dict(), t.planted_crop.city, t.planted_crop.crop_name) for t, _ in rows]
+
+        # Merge in virtual-schedule crops, keeping (due_date, id) order and paging.
+        # An empty page can't tell us whether any exist, so look them up then.
+        virtual = []
+        if not rows or rows[0].has_virtual:
+            virtual = list_virtual_tasks(current_user.id, completed, due_from, due_to, crop, cursor)
+    if virtual:
+        entries = sorted(entries + virtual, key=lambda e: (e[0], e[1]))
+        has_more = next_cursor is not None or (limit is not None and len(entries) > limit)
+        if limit is not None:
+            entries = entries[:limit]
+        next_cursor = encode_cursor(entries[-1][0], entries[-1][1]) if has_more and entries else None
+
+    # Smart Adjustment based on current weather: precomputed by the advice
+    # worker when it's running, otherwise resolved inline for this request
+    use_snapshot = advice_worker.running
+    if not use_snapshot:
+        # Resolve every distinct city up front, concurrently, under one deadline
+        with span('weather'):
+            weather_cache = get_weather_many([e[3] for e in entries], WEATHER_API_KEY)
+        advice_map = build_advice_map([(e[3], e[4]) for e in entries], weather_cache)
+
+    adjusted_tasks = []
+    for _, _, task_dict, city, crop_name in entries:
+        if use_snapshot:
+            advice = advice_worker.get((city, crop_name)) or {}
+        else:
+            advice = advice_map[(city, crop_name)]
+        task_dict.update(advice)
         adjusted_tasks.append(task_dict)
 
-    # Sort by date
-    adjusted_tasks.sort(key=lambda x: x['due_date'])
-    return jsonify(adjusted_tasks)
+    # Already sorted by (due_date, id)
+    with span('serialize'):
+        response = jsonify(adjusted_tasks)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    # X-Advice-Age / X-Advice-Stale are added by conditional_get in snapshot mode
+    return response
 
-@app.route('/api/tasks/<int:task_id>/complete', methods=['POST'])
+@app.route('/api/tasks/<int(signed=True):task_id>/complete', methods=['POST'])
 @token_required
 def complete_task(current_user, task_id):
+    if task_id < 0:
+        return complete_virtual_task(current_user, task_id)
+
     task = IrrigationTask.query.filter_by(id=task_id, user_id=current_user.id).first()
     if not task:
         return jsonify({"error": "Task not found"}), 404
         
     task.completed = True
     task.completed_at = datetime.utcnow()
+    bump_versions([current_user.id], 'tasks')
     db.session.commit()
     return jsonify({"message": "Task marked as complete", "task": task.to_dict()})
 
+def complete_virtual_task(current_user, task_id):
+    crop_id, occurrence = decode_virtual_task_id(task_id)
+    crop = PlantedCrop.query.filter_by(id=crop_id, user_id=current_user.id, virtual_schedule=True).first()
+    due_date = None
+    if crop and crop.harvest_date:
+        due_date = virtual_due_date(crop.planting_date, crop.harvest_date, crop.irrigation_frequency_days, occurrence)
+    if not due_date:
+        return jsonify({"error": "Task not found"}), 404
+
+    completion = IrrigationCompletion.query.filter_by(planted_crop_id=crop.id, due_date=due_date).first()
+    if not completion:
+        completion = IrrigationCompletion(planted_crop_id=crop.id, user_id=current_user.id, due_date=due_date)
+        db.session.add(completion)
+    completion.completed_at = datetime.utcnow()
+    bump_versions([current_user.id], 'tasks')
+    db.session.commit()
+    return jsonify({"message": "Task marked as complete", "task": virtual_task_dict(crop, occurrence, due_date, completion.completed_at)})
+
 @app.route('/api/my-crops', methods=['GET'])
 @token_required
+@conditional_get('crops')
 def get_my_crops(current_user):
     crops = PlantedCrop.query.filter_by(user_id=current_user.id).all()
     return jsonify([c.to_dict() for c in crops])
@@ -471,8 +1193,194 @@ def delete_crop(current_user, crop_id):
         return jsonify({"error": "Crop not found"}), 404
         
     db.session.delete(crop)
+    bump_versions([current_user.id], 'crops', 'tasks')
     db.session.commit()
     return jsonify({"message": "Crop and its schedule removed successfully"})
 
+# --- BULK EXPORT ---
+HISTORY_EXPORT_COLUMNS = [
+    'id', 'date', 'city', 'predicted_crop', 'confidence',
+    'nitrogen', 'phosphorus', 'potassium', 'moisture', 'soil_type'
+]
+IRRIGATION_EXPORT_COLUMNS = ['task_id', 'planted_crop_id', 'crop_name', 'city', 'due_date', 'completed_at']
+
+def stream_rows(statement):
+    """Executes lazily and yields row tuples EXPORT_BATCH_SIZE at a time, never holding the full result."""
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for row in result:
+        yield tuple(row)
+
+def export_response(name, columns, rows):
+    """Streams rows as ?format=ndjson (default) or csv. Validate filters before calling."""
+    fmt = request.args.get('format', 'ndjson').lower()
+    filename = f"{name}_{datetime.utcnow().strftime('%Y%m%d')}.{fmt}"
+    return Response(
+        stream_with_context(export_chunks(fmt, columns, rows)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+def parse_export_args():
+    """Returns (from, to) from the query string; raises ValueError on bad input."""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"'format' must be one of: {', '.join(EXPORT_FORMATS)}")
+    return parse_date(request.args.get('from'), 'from'), parse_date(request.args.get('to'), 'to')
+
+@app.route('/api/export/history', methods=['GET'])
+@token_required
+def export_history(current_user):
+    try:
+        start, end = parse_export_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    statement = select(
+        PredictionHistory.id, PredictionHistory.date, PredictionHistory.city,
+        PredictionHistory.predicted_crop, PredictionHistory.confidence,
+        PredictionHistory.nitrogen, PredictionHistory.phosphorus, PredictionHistory.potassium,
+        PredictionHistory.moisture, PredictionHistory.soil_type
+    ).where(
+        PredictionHistory.user_id == current_user.id,
+        *date_window(PredictionHistory.date, start, end)
+    ).order_by(PredictionHistory.date, PredictionHistory.id)
+    return export_response('prediction_history', HISTORY_EXPORT_COLUMNS, stream_rows(statement))
+
+def virtual_completion_rows(statement):
+    """Completion rows of virtual-schedule crops, with their virtual task ids."""
+    for crop_id, crop_name, city, planting_date, freq, due_date, completed_at in stream_rows(statement):
+        occurrence = (due_date - planting_date).days // freq
+        yield (encode_virtual_task_id(crop_id, occurrence), crop_id, crop_name, city, due_date, completed_at)
+
+@app.route('/api/export/irrigation', methods=['GET'])
+@token_required
+def export_irrigation(current_user):
+    """Completed irrigation tasks (materialized and virtual), ordered by completion time."""
+    try:
+        start, end = parse_export_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    materialized = select(
+        IrrigationTask.id, PlantedCrop.id, PlantedCrop.crop_name, PlantedCrop.city,
+        IrrigationTask.due_date, IrrigationTask.completed_at
+    ).join(PlantedCrop, IrrigationTask.planted_crop_id == PlantedCrop.id).where(
+        IrrigationTask.user_id == current_user.id,
+        IrrigationTask.completed.is_(True),
+        *date_window(IrrigationTask.completed_at, start, end)
+    ).order_by(IrrigationTask.completed_at, IrrigationTask.id)
+
+    virtual = select(
+        PlantedCrop.id, PlantedCrop.crop_name, PlantedCrop.city, PlantedCrop.planting_date,
+        PlantedCrop.irrigation_frequency_days, IrrigationCompletion.due_date, IrrigationCompletion.completed_at
+    ).join(PlantedCrop, IrrigationCompletion.planted_crop_id == PlantedCrop.id).where(
+        IrrigationCompletion.user_id == current_user.id,
+        *date_window(IrrigationCompletion.completed_at, start, end)
+    ).order_by(IrrigationCompletion.completed_at, IrrigationCompletion.id)
+
+    def rows():
+        # Both streams are sorted by completed_at; merge them lazily with
+        # both cursors open on the same connection
+        yield from heapq.merge(
+            stream_rows(materialized), virtual_completion_rows(virtual),
+            key=lambda r: r[5] or datetime.min
+        )
+
+    return export_response('irrigation_log', IRRIGATION_EXPORT_COLUMNS, rows())
+
+@app.route('/api/model/info', methods=['GET'])
+def model_info():
+    state = _MODEL_CACHE['active']
+    return jsonify({
+        "loaded": state is not None,
+        "version": state['version'] if state else None,
+        "load": state['stats'] if state else None,
+        "reload": model_reloader.status(),
+        "batching": inference_batcher.stats() if INFERENCE_BATCHING else None,
+        "rss_mb": resident_memory_mb()
+    })
+
+@app.route('/api/model/reload', methods=['POST'])
+def trigger_model_reload():
+    """
+    Reloads MODEL_PATH in the background and swaps it in once validated.
+    Needs the X-Admin-Token header to match ADMIN_TOKEN (disabled when unset).
+    With ?wait=true the response waits for the reload to finish.
+    """
+    supplied = request.headers.get('X-Admin-Token', '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(supplied, ADMIN_TOKEN):
+        return jsonify({'error': 'Admin token required'}), 403
+    # Validated before triggering, so a bad value never starts a reload
+    try:
+        wait = parse_bool(request.args.get('wait'), 'wait')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    thread = model_reloader.trigger('admin endpoint')
+    if thread is None:
+        return jsonify({"message": "A reload is already in progress", "reload": model_reloader.status()}), 409
+    if wait:
+        thread.join()
+        status = model_reloader.status()
+        active = _MODEL_CACHE['active']
+        code = 500 if status['last_error'] else 200
+        return jsonify({"version": active['version'] if active else None, "reload": status}), code
+    return jsonify({"message": "Reload started", "reload": model_reloader.status()}), 202
+
+@app.route('/api/weather/cache', methods=['GET'])
+def weather_cache_info():
+    return jsonify(weather_cache_stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    extra = format_gauges('weather_cache', weather_cache_stats())
+    extra += format_gauges('history_write_behind', history_buffer.stats())
+    if RESPONSE_CACHE:
+        extra += format_gauges('response_cache', conditional_get.payload_cache.stats())
+    if AUTH_CACHE:
+        extra += format_gauges('auth_token_cache', token_cache.stats())
+        extra += format_gauges('auth_user_cache', user_cache.stats())
+    if INFERENCE_BATCHING:
+        batching = inference_batcher.stats()
+        # Distributions come from the histograms; a lifetime max can't be alerted on
+        for key in ('batch_size_buckets', 'queue_wait_ms_max'):
+            batching.pop(key)
+        extra += format_gauges('inference_batcher', batching)
+        extra += inference_batcher.batch_size_histogram.render() + inference_batcher.queue_wait_histogram.render()
+    state = _MODEL_CACHE['active']
+    model_stats = state['stats'] if state else {}
+    extra += format_gauges('model', {
+        'loaded': int(state is not None),
+        'load_seconds': model_stats.get('load_seconds'),
+        'rss_mb': resident_memory_mb()
+    })
+    if state:
+        extra += ["# TYPE model_info gauge", f'model_info{{version="{state["version"]}"}} 1']
+    reload_status = model_reloader.status()
+    extra += format_gauges('model_reload', {
+        'reloads': reload_status['reloads'],
+        'skipped': reload_status['skipped'],
+        'failures': reload_status['failures'],
+        'in_progress': int(reload_status['in_progress'])
+    })
+    return Response(render_metrics(extra), mimetype='text/plain; version=0.0.4')
+
+# --- STARTUP ---
+# Eager preload: load once in the master so forked workers (gunicorn --preload) share the pages
+if PRELOAD_MODEL:
+    load_ml_model()
+
+if ADVICE_WORKER:
+    advice_worker.start()
+
+if MODEL_WATCH_SECONDS > 0:
+    model_reloader.start_watcher()
+
+    # Under gunicorn --preload the thread above only exists in the master;
+    # each forked worker starts its own watcher on its first request
+    @app.before_request
+    def _ensure_model_watcher():
+        model_reloader.ensure_watcher()
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,103 @@
+import random
+from datetime import datetime, timedelta
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sqlalchemy import insert
+
+SOIL_TYPES = ['Black', 'Clayey', 'Loamy', 'Red', 'Sandy']
+CROPS = ['rice', 'maize', 'wheat', 'cotton', 'coffee', 'mango', 'grapes', 'lentil']
+CITIES = ['Mumbai', 'Pune', 'Nashik', 'Nagpur', 'Surat', 'Indore', 'Bhopal', 'Jaipur']
+
+
+def build_synthetic_model(path, n_rows=2000, n_estimators=25, seed=0):
+    """
+    Trains a tiny forest on random soil readings and saves it in the same
+    {'model', 'columns'} joblib format as Models/crop_recommendation_model.pkl.
+    """
+    rng = np.random.default_rng(seed)
+    columns = ['Temparature', 'Humidity', 'Moisture', 'Nitrogen', 'Potassium', 'Phosphorous'] + \
+        [f'Soil_{s}' for s in SOIL_TYPES]
+
+    X = pd.DataFrame(0.0, index=range(n_rows), columns=columns)
+    X['Temparature'] = rng.uniform(15, 40, n_rows)
+    X['Humidity'] = rng.uniform(30, 95, n_rows)
+    X['Moisture'] = rng.uniform(10, 70, n_rows)
+    X['Nitrogen'] = rng.integers(0, 140, n_rows)
+    X['Potassium'] = rng.integers(0, 60, n_rows)
+    X['Phosphorous'] = rng.integers(0, 60, n_rows)
+    soil = rng.integers(0, len(SOIL_TYPES), n_rows)
+    for i, s in enumerate(SOIL_TYPES):
+        X[f'Soil_{s}'] = (soil == i).astype(float)
+
+    # Label mostly by nitrogen band, with some noise so trees have real depth
+    band = (X['Nitrogen'] // (140 / len(CROPS))).astype(int).clip(0, len(CROPS) - 1).to_numpy().copy()
+    noise = rng.random(n_rows) < 0.15
+    band[noise] = rng.integers(0, len(CROPS), noise.sum())
+    y = np.array(CROPS)[band]
+
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=12, random_state=seed).fit(X, y)
+    joblib.dump({'model': model, 'columns': columns}, path)
+    return path
+
+
+def random_sample(rng):
+    return {
+        'N': rng.randint(0, 140),
+        'P': rng.randint(5, 60),
+        'K': rng.randint(5, 60),
+        'moisture': round(rng.uniform(10, 70), 1),
+        'soil_type': rng.choice(SOIL_TYPES),
+        'city': rng.choice(CITIES)
+    }
+
+
+def seed_user(app_module, username, n_crops, n_history, seed=0):
+    """
+    Creates a user with n_crops planted crops (and their irrigation
+    schedules) and n_history prediction rows. Returns the user id.
+    """
+    rng = random.Random(seed)
+    A = app_module
+    with A.app.app_context():
+        user = A.User(username=username, email=f"{username}@bench.local")
+        user.set_password('bench')
+        A.db.session.add(user)
+        A.db.session.flush()
+
+        start = datetime.utcnow() - timedelta(days=200)
+        entries = [{
+            'crop_name': rng.choice(CROPS),
+            'city': rng.choice(CITIES),
+            'planting_date': (start + timedelta(days=rng.randint(0, 180))).strftime('%Y-%m-%d')
+        } for _ in range(n_crops)]
+        if entries:
+            A.plant_crops(user.id, entries)
+
+        history = []
+        for i in range(n_history):
+            s = random_sample(rng)
+            history.append({
+                'user_id': user.id,
+                'date': start + timedelta(minutes=i * 7),
+                'city': s['city'],
+                'nitrogen': s['N'],
+                'phosphorus': s['P'],
+                'potassium': s['K'],
+                'moisture': s['moisture'],
+                'soil_type': s['soil_type'],
+                'predicted_crop': rng.choice(CROPS),
+                'confidence': round(rng.uniform(20, 95), 1)
+            })
+        if history:
+            A.db.session.execute(insert(A.PredictionHistory), history)
+        A.db.session.commit()
+        return user.id
+
+
+def auth_header(app_module, username):
+    client = app_module.app.test_client()
+    token = client.post('/api/login', json={'email': f"{username}@bench.local", 'password': 'bench'}).json['token']
+    return {'Authorization': f'Bearer {token}'}
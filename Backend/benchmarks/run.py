@@ -0,0 +1,177 @@
+"""
+Offline endpoint latency benchmarks.
+
+Runs the Flask app in-process against a throwaway SQLite database, a local
+stub weather server and a small synthetic model, then reports p50/p95/p99
+latency and throughput per endpoint for each data size.
+
+    cd Backend
+    python -m benchmarks.run --sizes 10,100,1000 --requests 200
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.25
+
+With --baseline the run exits non-zero if any endpoint's p95 grew by more
+than the tolerance.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import importlib
+
+import numpy as np
+
+from benchmarks.fixtures import auth_header, build_synthetic_model, random_sample, seed_user, CITIES, CROPS
+from benchmarks.stub_weather import StubWeatherServer
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the crop API endpoints offline.")
+    parser.add_argument('--sizes', default='10,100,1000',
+                        help="Comma-separated data sizes: N history rows and N/10 planted crops per user.")
+    parser.add_argument('--requests', type=int, default=100, help="Measured requests per endpoint and size.")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per endpoint and size.")
+    parser.add_argument('--weather-latency-ms', type=float, default=20, help="Stub weather server latency.")
+    parser.add_argument('--cold-weather', action='store_true',
+                        help="Disable the weather cache so every lookup pays the stub latency.")
+    parser.add_argument('--baseline', help="Compare against a saved baseline JSON.")
+    parser.add_argument('--save-baseline', help="Write this run's results to a JSON file.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p95 growth over baseline (0.2 = 20%%).")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def configure_environment(workdir, stub, args):
+    """Points the app at SQLite, the stub server and the synthetic model before it is imported."""
+    model_path = build_synthetic_model(os.path.join(workdir, 'crop_recommendation_model.pkl'), seed=args.seed)
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'WEATHER_API_URL': stub.url,
+        'WEATHER_API_KEY': 'bench',
+        'MODEL_PATH': model_path,
+        'SECRET_KEY': 'benchmark-secret-key-0123456789abcdef'
+    })
+    if args.cold_weather:
+        os.environ.update({'WEATHER_CACHE_TTL': '0', 'WEATHER_CACHE_STALE_TTL': '0', 'WEATHER_CACHE_NEGATIVE_TTL': '0'})
+
+
+def endpoint_calls(client, headers, rng):
+    """(name, callable) for each benchmarked endpoint; read-only ones first."""
+    return [
+        ('GET /api/history', lambda: client.get('/api/history', headers=headers)),
+        ('GET /api/stats', lambda: client.get('/api/stats', headers=headers)),
+        ('GET /api/tasks', lambda: client.get('/api/tasks', headers=headers)),
+        ('POST /api/predict', lambda: client.post('/api/predict', json=random_sample(rng), headers=headers)),
+        ('POST /api/plant', lambda: client.post('/api/plant', json={
+            'crop_name': rng.choice(CROPS), 'city': rng.choice(CITIES)
+        }, headers=headers)),
+    ]
+
+
+def measure(call, n_requests, warmup):
+    for _ in range(warmup):
+        call()
+    timings = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(n_requests):
+        t0 = time.perf_counter()
+        response = call()
+        timings.append(time.perf_counter() - t0)
+        if response.status_code >= 400:
+            errors += 1
+    total = time.perf_counter() - started
+
+    ms = np.array(timings) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'rps': round(n_requests / total, 1),
+        'errors': errors
+    }
+
+
+def run(args):
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    rng = random.Random(args.seed)
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix='crop-bench-') as workdir:
+        stub = StubWeatherServer(latency_ms=args.weather_latency_ms).start()
+        try:
+            configure_environment(workdir, stub, args)
+            app_module = importlib.import_module('app')
+            app_module.load_ml_model()
+            client = app_module.app.test_client()
+
+            for size in sizes:
+                username = f"bench_{size}"
+                seed_user(app_module, username, n_crops=max(1, size // 10), n_history=size, seed=args.seed + size)
+                headers = auth_header(app_module, username)
+
+                results[str(size)] = {}
+                for name, call in endpoint_calls(client, headers, rng):
+                    results[str(size)][name] = measure(call, args.requests, args.warmup)
+        finally:
+            stub.stop()
+
+    return {
+        'meta': {
+            'requests': args.requests,
+            'weather_latency_ms': args.weather_latency_ms,
+            'cold_weather': args.cold_weather,
+            'python': sys.version.split()[0]
+        },
+        'results': results
+    }
+
+
+def print_report(report, baseline=None, tolerance=0.2):
+    regressions = []
+    header = f"{'size':>6}  {'endpoint':<20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}  {'vs base p95':>11}"
+    print(header)
+    print('-' * len(header))
+    for size, endpoints in report['results'].items():
+        for name, r in endpoints.items():
+            delta = ''
+            base = (baseline or {}).get('results', {}).get(size, {}).get(name)
+            if base and base['p95_ms'] > 0:
+                ratio = r['p95_ms'] / base['p95_ms']
+                delta = f"{(ratio - 1) * 100:+.0f}%"
+                if ratio > 1 + tolerance:
+                    delta += ' !'
+                    regressions.append((size, name, base['p95_ms'], r['p95_ms']))
+            errors = f"  ({r['errors']} errors)" if r['errors'] else ''
+            print(f"{size:>6}  {name:<20} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['rps']:>8.1f}  {delta:>11}{errors}")
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = run(args)
+    regressions = print_report(report, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} endpoint(s) regressed beyond {args.tolerance:.0%} at p95:")
+        for size, name, before, after in regressions:
+            print(f"  size {size}: {name} {before:.2f}ms -> {after:.2f}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class StubWeatherServer:
+    """
+    Local stand-in for the OpenWeatherMap current-weather endpoint.
+
+    Every request sleeps `latency_ms` and answers with fixed readings.
+    Cities whose name starts with "unknown" get a 404, like a bad city name.
+    """
+
+    def __init__(self, latency_ms=0, temp=28.0, humidity=65, description="scattered clouds"):
+        self.latency = latency_ms / 1000.0
+        self.payload = {
+            'main': {'temp': temp, 'humidity': humidity},
+            'weather': [{'description': description}]
+        }
+        self.requests = 0
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.requests += 1
+                city = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+                time.sleep(stub.latency)
+                if city.lower().startswith('unknown'):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = json.dumps(stub.payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/data/2.5/weather"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
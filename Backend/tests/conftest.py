@@ -0,0 +1,44 @@
+"""
+Shared fixtures. Like the benchmarks, the app runs in-process against a
+throwaway SQLite database, a local stub weather server and a small
+synthetic model, so the suite needs no network or Postgres.
+
+    cd Backend
+    python -m pytest -q
+"""
+import os
+import sys
+import importlib
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import build_synthetic_model
+from benchmarks.stub_weather import StubWeatherServer
+
+
+@pytest.fixture(scope='session')
+def weather_stub():
+    stub = StubWeatherServer().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory, weather_stub):
+    """The app module, configured through the environment before its first import."""
+    workdir = tmp_path_factory.mktemp('app')
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{workdir / 'test.db'}",
+        'WEATHER_API_URL': weather_stub.url,
+        'WEATHER_API_KEY': 'test',
+        'MODEL_PATH': build_synthetic_model(str(workdir / 'crop_recommendation_model.pkl')),
+        'SECRET_KEY': 'test-secret-key-0123456789abcdef0123'
+    })
+    import Utils.weather_api as weather_api
+    import Utils.model_store as model_store
+    # Other tests may have imported these already, with the defaults
+    weather_api.BASE_URL = weather_stub.url
+    model_store.MODEL_PATH = os.environ['MODEL_PATH']
+    return importlib.import_module('app')
@@ -0,0 +1,35 @@
+import os
+import threading
+
+import pytest
+
+from Utils.background import LazyThread
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork()")
+def test_lazy_thread_restarts_in_forked_child():
+    stop = threading.Event()
+    resets = []
+    worker = LazyThread(stop.wait, "test-worker", reset=lambda: resets.append(os.getpid()))
+    worker.ensure()
+    assert worker.alive
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            # The parent's thread didn't survive; ensure() starts this process's own
+            before = worker.alive
+            worker.ensure()
+            ok = not before and worker.alive and resets == [os.getpid()]
+            os.write(write_fd, b'1' if ok else b'0')
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    result = os.read(read_fd, 1)
+    os.waitpid(pid, 0)
+    os.close(read_fd)
+    stop.set()
+
+    assert result == b'1'
+    assert resets == []
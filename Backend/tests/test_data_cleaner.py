@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from Utils.data_cleaner import extract_npk, extract_npk_series, iter_crop_rules
+
+TEXTS = [
+    "N:120, P2O5: 60, K2O: 40",
+    "Apply 80-100 kg N and 40g P per plant",
+    "N - 50; K:30",
+    "Farmyard manure only",
+    "",
+    None,
+    np.nan,
+]
+
+
+def expected_frame(texts, index=None):
+    return pd.DataFrame([extract_npk(t) for t in texts], index=index).astype(int)
+
+
+def test_series_matches_per_row_extract():
+    texts = pd.Series(TEXTS, dtype=object)
+    pd.testing.assert_frame_equal(extract_npk_series(texts), expected_frame(TEXTS))
+
+
+def test_all_blank_chunk_gives_zeros():
+    # What read_csv yields when every fertilizer cell in a chunk is empty
+    texts = pd.Series([np.nan, np.nan], index=[4, 5], dtype=np.float64)
+    pd.testing.assert_frame_equal(extract_npk_series(texts), expected_frame([np.nan, np.nan], index=[4, 5]))
+
+
+def test_iter_crop_rules_with_blank_chunk(tmp_path):
+    path = tmp_path / 'guide.csv'
+    pd.DataFrame({
+        'Crop_Name': ['Rice', 'Wheat', 'Maize'],
+        'Fertilizer_Application': ['N:120, P: 60, K: 40', None, None],
+        'Growing_Duration': ['120 days', '110 days', '90 days'],
+        'Cultivation_Guide': ['Flooded fields', 'Cool season', 'Well drained'],
+    }).to_csv(path, index=False)
+
+    rules = dict(iter_crop_rules(path, chunk_size=2))
+
+    assert (rules['Rice']['ideal_nitrogen'], rules['Rice']['ideal_phosphorus'], rules['Rice']['ideal_potassium']) == (120, 60, 40)
+    assert rules['Wheat']['ideal_nitrogen'] == 0 and rules['Maize']['ideal_potassium'] == 0
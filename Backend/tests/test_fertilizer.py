@@ -0,0 +1,43 @@
+import pytest
+
+from Utils.fertilizer import CropNutrientTable
+from benchmarks.fixtures import auth_header, seed_user
+
+
+@pytest.fixture(scope='module')
+def client(app_module):
+    A = app_module
+    seed_user(A, 'fertilizer', n_crops=0, n_history=0)
+    A._CROP_NUTRIENTS['table'] = CropNutrientTable({
+        'Rice': {'ideal_nitrogen': 120, 'ideal_phosphorus': 60, 'ideal_potassium': 40}
+    })
+    yield A.app.test_client(), auth_header(A, 'fertilizer')
+    A._CROP_NUTRIENTS['table'] = None
+
+
+def test_valid_field(client):
+    c, headers = client
+    response = c.post('/api/fertilizer', json={'crop': 'rice', 'N': 20, 'P': 10, 'K': 10, 'size': 2}, headers=headers)
+    assert response.status_code == 200
+    assert response.json['bags']['urea'] > 0
+
+
+@pytest.mark.parametrize('field', [
+    {'crop': 'rice', 'size': 'nan'},
+    {'crop': 'rice', 'size': 'inf'},
+    {'crop': 'rice', 'N': 'nan'},
+    {'crop': 'rice', 'K': '-Infinity'},
+])
+def test_non_finite_numbers_are_rejected(client, field):
+    c, headers = client
+    response = c.post('/api/fertilizer', json=field, headers=headers)
+    assert response.status_code == 400
+    assert 'finite' in response.json['error']
+
+
+def test_batch_reports_the_failing_field(client):
+    c, headers = client
+    fields = [{'crop': 'rice', 'size': 1}, {'crop': 'rice', 'size': 1, 'P': 'nan'}]
+    response = c.post('/api/fertilizer/batch', json={'fields': fields}, headers=headers)
+    assert response.status_code == 400
+    assert response.json['error'].startswith('Field 1:')
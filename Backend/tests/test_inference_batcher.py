@@ -0,0 +1,31 @@
+import threading
+
+import numpy as np
+
+from Utils.inference_batcher import InferenceBatcher
+
+
+def test_concurrent_rows_are_batched_and_recorded():
+    batcher = InferenceBatcher(lambda X: X.sum(axis=1), window_ms=50, max_batch=64)
+    results = [None] * 8
+    barrier = threading.Barrier(8)
+
+    def submit(i):
+        barrier.wait()
+        results[i] = batcher.submit(np.full((1, 3), i, dtype=np.float64))
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [[3.0 * i] for i in range(8)]
+    stats = batcher.stats()
+    assert stats['rows'] == 8 and stats['batches'] < 8
+
+    batch_lines = batcher.batch_size_histogram.render()
+    wait_lines = batcher.queue_wait_histogram.render()
+    assert f"inference_batch_size_count {stats['batches']}" in batch_lines
+    assert 'inference_queue_wait_seconds_count 8' in wait_lines
+    assert any(line.startswith('inference_queue_wait_seconds_bucket{le="0.1"}') for line in wait_lines)
@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture
+def admin(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', 'test-admin-token')
+    return app_module.app.test_client(), {'X-Admin-Token': 'test-admin-token'}
+
+
+def test_bad_wait_is_rejected_before_reloading(app_module, admin):
+    client, headers = admin
+    before = app_module.model_reloader.status()
+
+    response = client.post('/api/model/reload?wait=maybe', headers=headers)
+
+    assert response.status_code == 400
+    after = app_module.model_reloader.status()
+    assert after['last_started_at'] == before['last_started_at'] and not after['in_progress']
+
+
+def test_wait_reports_the_active_version(app_module, admin):
+    client, headers = admin
+    response = client.post('/api/model/reload?wait=true', headers=headers)
+
+    assert response.status_code == 200
+    assert response.json['version'] == app_module.current_model()['version']
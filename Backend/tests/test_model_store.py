@@ -0,0 +1,40 @@
+import os
+import stat
+
+import pytest
+
+import Utils.model_store as model_store
+from benchmarks.fixtures import build_synthetic_model
+
+
+@pytest.fixture
+def pkl_path(tmp_path):
+    path = build_synthetic_model(str(tmp_path / 'model.pkl'), n_rows=300, n_estimators=3)
+    os.chmod(path, 0o644)
+    return path
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.parametrize('backend', ['sklearn', 'compiled'])
+def test_derived_files_keep_the_model_permissions(pkl_path, backend):
+    model_store.load_model_bundle(pkl_path, use_mmap=True, backend=backend)
+    suffix = model_store.MMAP_SUFFIX if backend == 'sklearn' else '.forest.joblib'
+    derived = [f for f in os.listdir(os.path.dirname(pkl_path)) if f.endswith(suffix)]
+
+    assert len(derived) == 1
+    assert mode(os.path.join(os.path.dirname(pkl_path), derived[0])) == 0o644
+
+
+def test_compiled_backend_falls_back_to_pickle(pkl_path, monkeypatch):
+    def unreadable(*args, **kwargs):
+        raise PermissionError(13, 'Permission denied')
+
+    monkeypatch.setattr(model_store, 'load_compiled_model', unreadable)
+    model_data, stats = model_store.load_model_bundle(pkl_path, use_mmap=True, backend='compiled')
+
+    assert stats['backend'] == 'sklearn' and stats['mmap'] is False
+    assert stats['version'] == model_store.model_version(pkl_path)
+    assert hasattr(model_data['model'], 'estimators_')
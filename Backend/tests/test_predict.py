@@ -0,0 +1,56 @@
+import random
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import random_sample
+
+
+def dataframe_proba(model, columns, sample):
+    """The original one-row DataFrame path /api/predict used before the feature layout."""
+    input_df = pd.DataFrame(columns=columns)
+    input_df.loc[0] = 0
+    input_df['Nitrogen'] = sample['N']
+    input_df['Phosphorous'] = sample['P']
+    input_df['Potassium'] = sample['K']
+    input_df['Temparature'] = sample['temp']
+    input_df['Humidity'] = sample['humidity']
+    input_df['Moisture'] = sample['moisture']
+    soil_col = f"Soil_{sample['soil_type']}"
+    if soil_col in input_df.columns:
+        input_df[soil_col] = 1
+    return model.predict_proba(input_df)[0]
+
+
+@pytest.fixture(scope='module')
+def samples():
+    rng = random.Random(7)
+    samples = []
+    for _ in range(50):
+        s = random_sample(rng)
+        s.update(temp=round(rng.uniform(15, 40), 1), humidity=rng.randint(30, 95))
+        samples.append(s)
+    # Soil types the model has no column for leave every Soil_ column at zero
+    samples[0]['soil_type'] = 'Peaty'
+    samples[1]['soil_type'] = None
+    return samples
+
+
+def test_feature_row_matches_dataframe_path(app_module, samples):
+    A = app_module
+    bundle = joblib.load(A.MODEL_PATH)
+    state = A.current_model()
+
+    for sample in samples:
+        expected = dataframe_proba(bundle['model'], bundle['columns'], sample)
+        x = A.build_feature_row(sample, state['layout'])
+        np.testing.assert_allclose(A.predict_matrix(state['model'], x)[0], expected)
+
+
+def test_feature_matrix_matches_feature_rows(app_module, samples):
+    A = app_module
+    state = A.current_model()
+    rows = np.vstack([A.build_feature_row(s, state['layout']) for s in samples])
+    np.testing.assert_array_equal(A.build_feature_matrix(samples, state['layout']), rows)
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from benchmarks.fixtures import auth_header, seed_user
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.mark.parametrize('n_crops', [2, 40])
+def test_tasks_query_count_is_fixed(app_module, n_crops):
+    A = app_module
+    username = f"tasks{n_crops}"
+    seed_user(A, username, n_crops=n_crops, n_history=0, seed=n_crops)
+    client = A.app.test_client()
+    headers = auth_header(A, username)
+    with A.app.app_context():
+        engine = A.db.engine
+
+    with count_statements(engine) as statements:
+        response = client.get('/api/tasks', headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.json) > n_crops
+    # Loading the user, then tasks joined with their crops; nothing per task
+    assert len(statements) == 2, statements
@@ -0,0 +1,63 @@
+import time
+import threading
+
+import pytest
+
+import Utils.weather_api as weather_api
+from benchmarks.stub_weather import StubWeatherServer
+
+LATENCY_MS = 300
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """A slow stub weather server and an empty cache in front of it."""
+    server = StubWeatherServer(latency_ms=LATENCY_MS).start()
+    monkeypatch.setattr(weather_api, 'BASE_URL', server.url)
+    monkeypatch.setattr(weather_api, 'weather_cache', weather_api.WeatherCache(weather_api.fetch_weather))
+    yield server
+    server.stop()
+
+
+def test_distinct_cities_resolve_in_one_latency(stub):
+    cities = [f"City{i}" for i in range(6)]
+    started = time.monotonic()
+    result = weather_api.get_weather_many(cities, 'test')
+    elapsed = time.monotonic() - started
+
+    assert set(result) == set(cities)
+    assert all(w is not None for w in result.values())
+    assert stub.requests == len(cities)
+    # Sequential lookups would take len(cities) latencies
+    assert elapsed < 2 * LATENCY_MS / 1000
+
+
+def test_deadline_maps_slow_cities_to_none(stub):
+    weather_api.weather_cache._store('pune', {'temp': 30.0, 'humidity': 60, 'description': 'clear sky'})
+    started = time.monotonic()
+    result = weather_api.get_weather_many(['Pune', 'Slow1', 'Slow2'], 'test', deadline=0.05)
+    elapsed = time.monotonic() - started
+
+    assert result['Pune']['temp'] == 30.0
+    assert result['Slow1'] is None and result['Slow2'] is None
+    assert elapsed < LATENCY_MS / 1000
+
+
+def test_concurrent_misses_share_one_request(stub):
+    n = 20
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def lookup(i):
+        barrier.wait()
+        results[i] = weather_api.get_weather('Mumbai', 'test')
+
+    threads = [threading.Thread(target=lookup, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert stub.requests == 1
+    assert all(r == results[0] and r is not None for r in results)
+    assert weather_api.weather_cache.stats()['coalesced'] == n - 1
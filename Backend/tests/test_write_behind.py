@@ -0,0 +1,50 @@
+import time
+import threading
+
+from Utils.write_behind import WriteBehindBuffer
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_failed_batch_drops_only_bad_rows():
+    written = []
+
+    def flush(rows):
+        # Like a single multi-row INSERT: one bad row fails the statement
+        if any(r < 0 for r in rows):
+            raise ValueError("bad row")
+        written.extend(rows)
+
+    buffer = WriteBehindBuffer(flush, flush_rows=16, flush_ms=20)
+    rows = [-1 if i in (5, 33) else i for i in range(40)]
+    for row in rows:
+        assert buffer.put(row)
+
+    assert wait_for(lambda: buffer.stats()['flushed'] + buffer.stats()['failed'] == len(rows))
+    assert sorted(written) == [r for r in rows if r >= 0]
+    assert buffer.stats()['failed'] == 2
+    buffer.close()
+
+
+def test_close_flushes_a_full_queue():
+    gate = threading.Event()
+    written = []
+
+    def flush(rows):
+        gate.wait()
+        written.extend(rows)
+
+    buffer = WriteBehindBuffer(flush, flush_rows=2, flush_ms=10, max_queue=5, enqueue_timeout=0.01)
+    accepted = sum(buffer.put(i) for i in range(10))
+    threading.Timer(0.1, gate.set).start()
+
+    started = time.monotonic()
+    buffer.close(timeout=5)
+
+    assert time.monotonic() - started < 2
+    assert len(written) == accepted